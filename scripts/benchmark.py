@@ -1,13 +1,24 @@
 """This is just a simple benchmarking mechanism to determine
 timings for different options.
 """
+import argparse
+import ast
+import inspect
+import textwrap
 import time
+import typing
+from contextlib import redirect_stdout
 from dataclasses import dataclass, field
 from io import StringIO
 from pathlib import Path
-from typing import Callable, List, Tuple
+from typing import IO, Any, Callable, Dict, List, Tuple, Union
 
-from termlog import echo, green, magenta, set_config
+import pygments.lexers
+
+from termlog import beautify, blue, echo, green, magenta, red, set_config
+from termlog.interpret import extract_fields
+from termlog.lexers import clear_cache, formatter_for, guess_lexer, lexer_for
+from termlog.sgr import highlight, minimize
 
 set_config(timestamp=False)
 
@@ -100,6 +111,149 @@ def benchmark_all(count: int = 1000):
     ]
     benchmark_print(data, count=count)
     benchmark_echo(data, count=count)
+    benchmark_sink()
+    benchmark_background()
+    benchmark_event_loop()
+    benchmark_extract_fields()
+    benchmark_guess_lexer(data)
+    benchmark_beautify_block()
+    benchmark_streaming_highlighter()
+    benchmark_sgr_bytes(readme)
+
+
+def legacy_extract_fields(code: str) -> Dict[str, Any]:
+    """The queue based extractor ``extract_fields`` replaced (1.3.5),
+    kept here as a baseline: it truncates after 4096 nodes and pops from
+    the front of a list.
+
+    """
+    code = textwrap.dedent(code)
+    queue: List[Any] = ast.parse(code).body
+    fields: Dict[str, Any] = {}
+    count = -1
+    while queue:
+        count += 1
+        node = queue.pop(0)
+        if isinstance(node, (list, tuple)):
+            queue.extend(node)
+        elif isinstance(node, (ast.Expr, ast.FormattedValue, ast.Assign, ast.Starred, ast.Attribute, ast.Subscript, ast.AnnAssign)):
+            queue.append(node.value)
+        elif isinstance(node, (ast.Call,)):
+            queue.extend(node.args)
+        elif isinstance(node, (ast.JoinedStr, ast.BoolOp)):
+            queue.extend(node.values)
+        elif isinstance(node, (ast.Name,)):
+            fields.update({node.id: None})
+        elif isinstance(node, (ast.BinOp,)):
+            queue.append(node.left)
+            queue.append(node.right)
+        elif isinstance(node, (ast.FunctionDef,)):
+            queue.extend(node.body)
+        elif isinstance(node, (ast.If, ast.IfExp)):
+            queue.append(node.body)
+            queue.append(node.orelse)
+        if count > 4096:
+            break
+    return fields
+
+
+def benchmark_extract_fields(count: int = 10):
+    """Compares ``extract_fields`` against the legacy extractor on a few
+    large standard library modules.
+
+    """
+    for module in [argparse, inspect, typing]:
+        code = inspect.getsource(module)
+        for name, func in [("legacy", legacy_extract_fields), ("extract_fields", extract_fields)]:
+            with redirect_stdout(StringIO()), TimedExecutionBlock() as time:
+                for run in range(count):
+                    fields = func(code)
+            per_call = Duration(time.seconds / count)
+            took = magenta(f"{per_call.duration:.2f}")
+            echo(f"{module.__name__:>10} `{green(name)}` took {took} {per_call.unit} per call, found {len(fields)} fields")
+
+
+def benchmark_guess_lexer(data: List[str], count: int = 10):
+    """Compares pygments' ``guess_lexer`` against termlog's, without and
+    with its memoized guesses.
+
+    """
+
+    def unmemoized(text: str):
+        clear_cache()
+        return guess_lexer(text)
+
+    guessers = [
+        ("pygments", lambda text: pygments.lexers.guess_lexer(text, stripall=True)),
+        ("guess_lexer", unmemoized),
+        ("guess_lexer (memoized)", guess_lexer),
+    ]
+    for name, func in guessers:
+        with TimedExecutionBlock() as time:
+            for run in range(count):
+                for text in data:
+                    lexer = func(text)
+        per_call = Duration(time.seconds / count / len(data))
+        echo(f'`{green(name)}` took {magenta(f"{per_call.duration:.2f}")} {per_call.unit} per call, last guess {lexer.name}')
+
+
+def benchmark_beautify_block(lines: int = 10_000, count: int = 3):
+    """Compares highlighting a large json payload line by line against
+    highlighting it as one block.
+
+    """
+    import json
+
+    payload = json.dumps([{"id": index, "name": f"item {index}", "tags": ["a", "b"]} for index in range(lines // 8)], indent=2)
+    payload = "\n".join(payload.split("\n")[:lines])
+    for name, block in [("per line", False), ("block", True)]:
+        with TimedExecutionBlock() as time:
+            for run in range(count):
+                beautify(payload, lexer="json", block=block)
+        per_call = Duration(time.seconds / count)
+        echo(f'`{green(name)}` took {magenta(f"{per_call.duration:.2f}")} {per_call.unit} per {lines} lines')
+
+
+def benchmark_streaming_highlighter(lines: int = 10_000, chunk_size: int = 4096):
+    """Highlights a large json payload as it streams in, in chunks."""
+    import json
+
+    from termlog.highlighter import StreamingHighlighter
+
+    payload = json.dumps([{"id": index, "name": f"item {index}", "tags": ["a", "b"]} for index in range(lines // 8)], indent=2)
+    payload = "\n".join(payload.split("\n")[:lines])
+    highlighter = StreamingHighlighter(lexer="json")
+    with TimedExecutionBlock() as time:
+        for index in range(0, len(payload), chunk_size):
+            highlighter.feed(payload[index : index + chunk_size])
+        highlighter.close()
+    elapsed = Duration(time.seconds)
+    echo(f'`{green("streaming")}` took {magenta(f"{elapsed.duration:.2f}")} {elapsed.unit} per {lines} lines')
+
+
+def benchmark_sgr_bytes(readme: str):
+    """Compares the bytes of highlighted and nested colored output before
+    and after minimizing their escape sequences.
+
+    """
+    import json
+
+    payload = json.dumps([{"id": index, "name": f"item {index}", "tags": ["a", "b"]} for index in range(100)], indent=2)
+    formatter = formatter_for("16m")
+    samples = [
+        ("json", pygments.highlight(payload, lexer_for("json"), formatter), highlight(lexer_for("json").get_tokens(payload), formatter)),
+        ("readme", pygments.highlight(readme, lexer_for("rst"), formatter), highlight(lexer_for("rst").get_tokens(readme), formatter)),
+        ("python", pygments.highlight(inspect.getsource(typing), lexer_for("python"), formatter), None),
+    ]
+    nested = "".join(red(f"{index} {green('ok')} {blue('done')}", truecolor=True) + red(" ") + red("|") for index in range(1000))
+    samples.append(("nested colors", nested, None))
+    for name, original, emitted in samples:
+        before = len(original.encode("utf-8"))
+        after = len(minimize(original).encode("utf-8"))
+        message = f"{name:>14}: {before} bytes, minimized {magenta(after)} ({after / before:.0%})"
+        if emitted is not None:
+            message += f', emitted {magenta(len(emitted.encode("utf-8")))}'
+        echo(message)
 
 
 def benchmark_print(data: List[str], count: int = 1000):
@@ -120,5 +274,110 @@ def benchmark_echo(data: List[str], count: int = 1000):
         echo(f' `{green("echo")}` took {magenta(f"{duration:.2f}")} {unit}')
 
 
+def benchmark_sink(lines: int = 20_000):
+    """Compares echoing into a pipe with a flush per line against
+    echoing through buffered sinks.
+
+    """
+    import os
+    import threading
+
+    from termlog.sinks import BufferedSink, FlushPolicy
+
+    read_fd, write_fd = os.pipe()
+    drain = threading.Thread(target=lambda: [None for _ in iter(lambda: os.read(read_fd, 1 << 16), b"")], daemon=True)
+    drain.start()
+    with open(write_fd, "w") as pipe:
+        targets: List[Tuple[str, Union[IO, BufferedSink]]] = [
+            ("flush per line", pipe),
+            ("buffered sink", BufferedSink(pipe)),
+            ("adaptive sink", BufferedSink(pipe, FlushPolicy(adaptive=True))),
+        ]
+        for name, target in targets:
+            with TimedExecutionBlock() as time:
+                for index in range(lines):
+                    echo("request served", index, file=target, color=False)
+                target.flush()
+            echo(f'`{green(name)}`: {magenta(f"{lines / time.seconds:,.0f}")} lines/sec')
+            if isinstance(target, BufferedSink):
+                target.close()
+    drain.join()
+    os.close(read_fd)
+
+
+def benchmark_background(lines: int = 2_000, delay: float = 0.0002):
+    """Compares the time callers spend in echo with a slow stream, on
+    their own thread and with a background writer.
+
+    """
+    from time import sleep
+
+    from termlog.dispatch import drain
+
+    class SlowStream(StringIO):
+        def flush(self):
+            sleep(delay)
+
+    for name, background in [("foreground", False), ("background", True)]:
+        set_config(background=background)
+        stream = SlowStream()
+        with TimedExecutionBlock() as time:
+            for index in range(lines):
+                echo("request served", index, file=stream, color=False)
+        drain()
+        per_call = Duration(time.seconds / lines)
+        echo(f'`{green(name)}` echo took {magenta(f"{per_call.duration:.2f}")} {per_call.unit} per call')
+    set_config(background=False)
+
+
+def benchmark_event_loop(producers: int = 8, lines: int = 250, delay: float = 0.0002):
+    """Measures how late a 1 msec timer fires on an event loop while
+    coroutines log heavily to a slow stream, with echo and with aecho.
+
+    """
+    import asyncio
+
+    from termlog.aio import aecho, drain
+
+    class SlowStream(StringIO):
+        def flush(self):
+            time.sleep(delay)
+
+    async def produce(log, stream):
+        for index in range(lines):
+            await log("request served", index, file=stream, color=False)
+            await asyncio.sleep(0)
+
+    async def echo_coroutine(*messages, **kwds):
+        echo(*messages, **kwds)
+
+    async def measure(log):
+        stream = SlowStream()
+        lags = []
+        done = asyncio.Event()
+
+        async def tick():
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append(time.perf_counter() - start - 0.001)
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.gather(*(produce(log, stream) for _ in range(producers)))
+        await drain()
+        done.set()
+        await ticker
+        return sorted(lags)
+
+    for name, log in [("echo", echo_coroutine), ("aecho", aecho)]:
+        lags = asyncio.run(measure(log))
+        p99 = Duration(lags[int(len(lags) * 0.99)])
+        worst = Duration(lags[-1])
+        echo(
+            f'`{green(name)}` timer lag: p99 {magenta(f"{p99.duration:.2f}")} {p99.unit},'
+            f' max {magenta(f"{worst.duration:.2f}")} {worst.unit} over {len(lags)} ticks'
+        )
+
+
 if __name__ == "__main__":
     benchmark_all()
@@ -1,13 +1,22 @@
+import importlib
 from typing import Any
 
-from . import palettes
-from .colors import Color, rgb
 from .formatting import beautify, format
-from .palettes import Palette, get_palette, set_palette
 from .terminal import echo, set_config
 
 __version__ = "1.3.5"
 
+# Imported on first use to keep `import termlog` fast, see __getattr__
+_lazy = {
+    "aecho": "aio",
+    "AsyncSink": "aio",
+    "Color": "colors",
+    "rgb": "colors",
+    "Palette": "palettes",
+    "get_palette": "palettes",
+    "set_palette": "palettes",
+}
+
 
 def __getattr__(name: str) -> Any:
     """__getattr__ should be called _after_ __getattribute__ and only if
@@ -16,7 +25,16 @@ def __getattr__(name: str) -> Any:
     This is magic and will grab the color of the default palette as if
     it were part of the top level termlog structure.
 
+    The palettes (and colors) are only imported here, the first time
+    they're needed.
+
     """
+    if name in _lazy:
+        value = globals()[name] = getattr(importlib.import_module(f".{_lazy[name]}", __name__), name)
+        return value
+    palettes = importlib.import_module(".palettes", __name__)
+    if name == "palettes":
+        return palettes
     palette = locals()["palette"] = palettes.get_palette()
     # This handles from termlog import *
     #   But from termlog import * prevents updates to the palette,
@@ -39,7 +57,8 @@ def __getattr__(name: str) -> Any:
     #    '\x1b[38;2;220;50;47mhi\x1b[0m'
     #
     if name == "__all__":
-        return [key for key in palette.__annotations__ if isinstance(getattr(palette, key), Color)] + [
+        color = importlib.import_module(".colors", __name__).Color
+        return [key for key in palette.__annotations__ if isinstance(getattr(palette, key), color)] + [
             "Color",
             "rgb",
             "format",
@@ -48,6 +67,8 @@ def __getattr__(name: str) -> Any:
             "set_palette",
             "Palette",
             "echo",
+            "aecho",
+            "AsyncSink",
             "set_config",
         ]
     else:
@@ -0,0 +1,290 @@
+"""asyncio support
+
+:func:`aecho` is :func:`termlog.echo` for coroutines: the message is
+formatted right away, but written through an :class:`AsyncSink` so that
+a slow stream never blocks the event loop.
+
+A sink writes in one of two ways:
+
+* through an executor (the default): writes made while a previous batch
+  is being written are gathered into the next batch.  A dedicated thread
+  keeps writing and flushing batches until nothing is left, so lines are
+  written out even if the loop stops without draining the sink
+* through the loop's pipe transport, with ``transport=True``: writes go
+  straight to the non-blocking file descriptor.  The descriptor is put
+  in non-blocking mode, which is shared with every other user of it, so
+  this is best kept to streams only written through the sink
+
+Either way, a writer that gets more than *high_water* characters ahead
+of the stream waits for it to catch up, so heavy logging slows the
+logging coroutines down rather than growing memory without bound.
+
+The sinks :func:`aecho` creates for plain streams are drained and closed
+when their loop shuts down (``loop.shutdown_asyncgens()``, which
+``asyncio.run`` calls), so everything logged from a loop is written
+before ``asyncio.run`` returns.
+
+"""
+import asyncio
+import concurrent.futures
+import os
+import stat
+import sys
+import threading
+import traceback
+import weakref
+from typing import IO, TYPE_CHECKING, Any, AsyncGenerator, Dict, List, Mapping, Optional, Union
+
+from .formatting import format
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pygments.lexer import Lexer
+
+__all__ = ("AsyncSink", "aecho", "drain")
+
+HIGH_WATER = 64 * 1024
+
+
+class AsyncSink:
+    """Writes text to *file* without blocking the event loop
+
+    The sink belongs to the loop it is first written from.
+
+    Example:
+        >>> sink = AsyncSink(sys.stdout)
+        >>> await aecho("hello", file=sink)
+        >>> await sink.aclose()
+
+    Args:
+        file: stream to write to; sys.stdout when not provided
+        high_water: characters that may be waiting to be written before
+            writers are made to wait
+        transport: when True, write through the loop's pipe transport
+            if *file* is a pipe, socket or terminal
+
+    """
+
+    def __init__(self, file: Optional[IO] = None, high_water: int = HIGH_WATER, transport: bool = False) -> None:
+        self.file = file if file is not None else sys.stdout
+        self.high_water = high_water
+        self.transport = transport
+        self._pending: List[str] = []
+        self._size = 0
+        # Guards the pending writes shared with the writing thread
+        self._lock = threading.Lock()
+        self._running = False
+        self._inflight: Optional["concurrent.futures.Future[None]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._opened = False
+        self._closed = False
+
+    async def write(self, text: str) -> None:
+        """Queues *text*, waiting first if the stream is too far behind.
+
+        Args:
+            text: text to write
+
+        """
+        if self._closed:
+            raise ValueError("I/O operation on closed sink.")
+        if not self._opened:
+            await self._open()
+        if self._writer is not None:
+            self._writer.write(text.encode(getattr(self.file, "encoding", None) or "utf-8"))
+            if self._writer.transport.get_write_buffer_size() > self.high_water:
+                await self._writer.drain()
+            return
+        with self._lock:
+            self._pending.append(text)
+            self._size += len(text)
+            running, self._running = self._running, True
+        if not running:
+            self._submit()
+        elif self._size > self.high_water:
+            await self.drain()
+
+    async def drain(self) -> None:
+        """Waits until everything written so far has reached the stream."""
+        if self._writer is not None:
+            await self._writer.drain()
+            return
+        while True:
+            with self._lock:
+                inflight = self._inflight
+            if inflight is None:
+                return
+            try:
+                await asyncio.shield(asyncio.wrap_future(inflight))
+            except Exception:
+                # already reported to the loop's exception handler
+                pass
+
+    async def aclose(self) -> None:
+        """Drains and stops the sink; the wrapped stream is not closed."""
+        if self._closed:
+            return
+        await self.drain()
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    async def _open(self) -> None:
+        self._opened = True
+        if self.transport and _is_pipe(self.file):
+            loop = asyncio.get_running_loop()
+            # Anything buffered by the stream itself goes first
+            self.file.flush()
+            pipe = os.fdopen(os.dup(self.file.fileno()), "wb", buffering=0)
+            try:
+                transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, pipe)
+            except (NotImplementedError, ValueError, OSError):
+                pipe.close()
+            else:
+                transport.set_write_buffer_limits(high=self.high_water)
+                self._writer = asyncio.StreamWriter(transport, protocol, None, loop)
+                return
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="termlog-aio")
+
+    def _submit(self) -> None:
+        # Not run_in_executor: the write may well finish after the loop is
+        #  closed, which must not call back into it
+        self._loop = asyncio.get_running_loop()
+        assert self._executor is not None
+        future = self._executor.submit(self._write_pending)
+        with self._lock:
+            self._inflight = future
+        future.add_done_callback(self._written)
+
+    def _write_pending(self) -> None:
+        # One thread writes batches until none are left, which keeps the
+        #  writes in order
+        try:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        self._running = False
+                        return
+                    batch, self._pending, self._size = "".join(self._pending), [], 0
+                self.file.write(batch)
+                self.file.flush()
+        except BaseException:
+            with self._lock:
+                self._running = False
+            raise
+
+    def _written(self, future: "concurrent.futures.Future[None]") -> None:
+        # Called on the writing thread
+        with self._lock:
+            if self._inflight is future:
+                self._inflight = None
+        error = None if future.cancelled() else future.exception()
+        if error is None:
+            return
+        # Reported to the loop rather than raised in whichever coroutine
+        #  happens to write next
+        context = {"message": "termlog could not write", "exception": error}
+        loop = self._loop
+        try:
+            if loop is None or loop.is_closed():
+                raise RuntimeError("Event loop is closed")
+            loop.call_soon_threadsafe(loop.call_exception_handler, context)
+        except RuntimeError:
+            traceback.print_exception(type(error), error, error.__traceback__, file=sys.__stderr__)
+
+
+def _is_pipe(file: IO) -> bool:
+    try:
+        mode = os.fstat(file.fileno()).st_mode
+    except (AttributeError, OSError, ValueError):
+        # e.g. io.StringIO
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or stat.S_ISCHR(mode)
+
+
+# The sinks aecho creates for plain streams, per loop and stream
+_default_sinks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[int, AsyncSink]]" = weakref.WeakKeyDictionary()
+# ... and, per loop, what closes them when the loop shuts down
+_shutdown_hooks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGenerator[None, None]]" = weakref.WeakKeyDictionary()
+
+
+async def _sink_for(file: IO) -> AsyncSink:
+    loop = asyncio.get_running_loop()
+    sinks = _default_sinks.get(loop)
+    if sinks is None:
+        sinks = _default_sinks[loop] = {}
+        # A started async generator is closed by loop.shutdown_asyncgens(),
+        #  which asyncio.run calls before closing the loop
+        hook = _shutdown_hooks[loop] = _close_at_shutdown()
+        await hook.asend(None)
+    sink = sinks.get(id(file))
+    if sink is None or sink.file is not file:
+        sink = sinks[id(file)] = AsyncSink(file)
+    return sink
+
+
+async def _close_at_shutdown() -> AsyncGenerator[None, None]:
+    try:
+        yield
+    finally:
+        # Everything aecho wrote is out before the loop is gone
+        loop = asyncio.get_running_loop()
+        _shutdown_hooks.pop(loop, None)
+        for sink in list(_default_sinks.pop(loop, {}).values()):
+            await sink.aclose()
+
+
+async def aecho(
+    *messages: Any,
+    verbose: Optional[Union[bool, int]] = None,
+    end: str = "\n",
+    lexer: Optional[Union["Lexer", str]] = None,
+    file: Optional[Union[IO, AsyncSink]] = None,
+    color: Optional[bool] = None,
+    json: Optional[bool] = None,
+    time_format: Optional[str] = None,
+    add_timestamp: Optional[bool] = None,
+    fields: Optional[Mapping[str, Any]] = None,
+) -> Optional[str]:
+    """Echo *message* from a coroutine.
+
+    Args:
+        messages: messages to echo
+        verbose: verbosity level
+        end: text to print at end of message, defaults to newline
+        lexer: message lexical analyzer
+        file: file to echo message to, or an :class:`AsyncSink`;
+            defaults to sys.stdout
+        json: Dump out a structured text
+        time_format: string to control time formatting
+        add_timestamp: Controls whether the timestamp is dumped out
+        color: control color output
+        fields: structured fields for json output; when provided, the
+            fields are not inferred from the calling code
+
+    Returns:
+        Tuple[str]: beautified messages
+
+    """
+    # verbose should be minimally capped to 0
+    verbose = 1 if verbose is None else max(int(verbose or 0), 0)
+    if not verbose:
+        return None
+
+    # Formatted before the first await, while the caller is at the call
+    string = format(*messages, lexer=lexer, color=color, json=json, time_format=time_format, add_timestamp=add_timestamp, fields=fields)
+    sink = file if isinstance(file, AsyncSink) else await _sink_for(file if file is not None else sys.stdout)
+    await sink.write(f"{string}{end}")
+    return string
+
+
+async def drain() -> None:
+    """Waits until everything :func:`aecho` wrote from this loop to plain
+    streams has reached them.
+
+    """
+    for sink in list(_default_sinks.get(asyncio.get_running_loop(), {}).values()):
+        await sink.drain()
@@ -0,0 +1,159 @@
+"""Bytecode field extraction
+
+Derives the names referenced by a call expression from the caller's code
+object and the offset of the instruction being executed, instead of from
+the source text.  This finds fields even when only ``.pyc`` files are
+deployed (zipapps, PEX files, pyc-only images) and never reads a file.
+
+Like :func:`termlog.interpret.extract_fields`, only names used as values
+are reported: the callee of a call and keyword arguments are skipped, and
+attribute chains on a name are reported whole (``user.id``).
+
+Instruction positions (``co_positions``) are only available on Python
+3.11+; on older interpreters :func:`extract_fields` returns None and the
+caller should fall back to the source.
+
+"""
+import bisect
+import dis
+import sys
+import weakref
+from types import CodeType
+from typing import Dict, List, Optional, Tuple
+
+__all__ = ("extract_fields",)
+
+# (lineno, col_offset, end_lineno, end_col_offset)
+Span = Tuple[int, int, int, int]
+
+_CALLS = frozenset(["CALL", "CALL_KW", "CALL_FUNCTION_EX"])
+# What follows the call of an awaited coroutine
+_AWAITS = frozenset(
+    ["GET_AWAITABLE", "LOAD_CONST", "SEND", "YIELD_VALUE", "RESUME", "JUMP_BACKWARD_NO_INTERRUPT", "CLEANUP_THROW", "END_SEND"]
+)
+_LOADS = frozenset(
+    [
+        "LOAD_NAME",
+        "LOAD_FAST",
+        "LOAD_FAST_CHECK",
+        "LOAD_FAST_BORROW",
+        "LOAD_FAST_LOAD_FAST",
+        "LOAD_FAST_BORROW_LOAD_FAST_BORROW",
+        "LOAD_GLOBAL",
+        "LOAD_DEREF",
+        "LOAD_CLASSDEREF",
+        "LOAD_FROM_DICT_OR_DEREF",
+        "LOAD_FROM_DICT_OR_GLOBALS",
+    ]
+)
+
+_instructions: "weakref.WeakKeyDictionary[CodeType, Tuple[List[int], List[dis.Instruction]]]" = weakref.WeakKeyDictionary()
+_call_sites: "weakref.WeakKeyDictionary[CodeType, Dict[int, Optional[Tuple[str, ...]]]]" = weakref.WeakKeyDictionary()
+
+
+def extract_fields(code: CodeType, lasti: int) -> Optional[Tuple[str, ...]]:
+    """Extracts the names referenced by the call running at *lasti*.
+
+    Args:
+        code: the calling code object
+        lasti: offset of the last instruction executed (``frame.f_lasti``)
+
+    Returns:
+        field names in source order or None if they cannot be determined
+
+    """
+    if not hasattr(code, "co_positions"):
+        return None
+    offsets = _call_sites.get(code)
+    if offsets is None:
+        offsets = _call_sites[code] = {}
+    if lasti not in offsets:
+        offsets[lasti] = _extract_fields(code, lasti)
+    return offsets[lasti]
+
+
+def _extract_fields(code: CodeType, lasti: int) -> Optional[Tuple[str, ...]]:
+    cached = _instructions.get(code)
+    if cached is None:
+        instructions = list(dis.get_instructions(code))
+        cached = _instructions[code] = ([instruction.offset for instruction in instructions], instructions)
+    offsets, instructions = cached
+
+    # lasti may point into the inline cache following the call
+    index = bisect.bisect_right(offsets, lasti) - 1
+    # A coroutine awaiting the call is suspended a few instructions past it
+    awaited = index
+    while awaited > 0 and instructions[awaited].opname in _AWAITS:
+        awaited -= 1
+    if awaited != index and instructions[awaited + 1].opname == "GET_AWAITABLE":
+        index = awaited
+    if index < 0 or instructions[index].opname not in _CALLS:
+        return None
+    call = instructions[index]
+    call_span = _span(call)
+    if call_span is None:
+        return None
+
+    nested = []
+    for instruction in instructions[:index]:
+        span = _span(instruction)
+        if span is not None and span != call_span and _contains(call_span, span):
+            nested.append((span, instruction))
+
+    # The callee is everything that starts where the call starts
+    callee_end = call_span[:2]
+    for span, instruction in nested:
+        if span[:2] == call_span[:2]:
+            callee_end = max(callee_end, span[2:])
+    arguments = [(span, instruction) for span, instruction in nested if span[:2] >= callee_end]
+
+    # Keyword values are the trailing top-level argument expressions
+    keyword_count = _keyword_count(code, instructions, index)
+    top_level = sorted({span for span, _ in arguments if not any(other != span and _contains(other, span) for other, _ in arguments)})
+    keywords = top_level[len(top_level) - keyword_count :] if keyword_count else []
+
+    call_starts = {span[:2] for span, instruction in arguments if instruction.opname in _CALLS}
+    names: Dict[str, None] = {}
+    for span, instruction in arguments:
+        if instruction.opname not in _LOADS:
+            continue
+        if span[:2] in call_starts or any(_contains(keyword, span) for keyword in keywords):
+            continue
+        argval = instruction.argval
+        loaded = list(argval) if isinstance(argval, tuple) else [argval]
+        # Attributes loaded right after a name are read from that name
+        loaded[-1] += _attributes(instructions, bisect.bisect_left(offsets, instruction.offset) + 1, index)
+        for name in loaded:
+            names[name] = None
+    return tuple(names)
+
+
+def _attributes(instructions: List[dis.Instruction], start: int, stop: int) -> str:
+    path = []
+    for instruction in instructions[start:stop]:
+        # Python 3.12+ flags method loads in the lowest bit
+        if instruction.opname != "LOAD_ATTR" or (sys.version_info >= (3, 12) and (instruction.arg or 0) & 1):
+            break
+        path.append(f".{instruction.argval}")
+    return "".join(path)
+
+
+def _span(instruction: dis.Instruction) -> Optional[Span]:
+    positions = getattr(instruction, "positions", None)
+    if positions is None or None in positions:
+        return None
+    return positions.lineno, positions.col_offset, positions.end_lineno, positions.end_col_offset
+
+
+def _contains(outer: Span, inner: Span) -> bool:
+    return outer[:2] <= inner[:2] and inner[2:] <= outer[2:]
+
+
+def _keyword_count(code: CodeType, instructions: List[dis.Instruction], index: int) -> int:
+    call = instructions[index]
+    for previous in reversed(instructions[max(index - 3, 0) : index]):
+        if previous.opname == "KW_NAMES":
+            return len(code.co_consts[previous.arg])
+        if call.opname == "CALL_KW" and previous.opname == "LOAD_CONST" and isinstance(previous.argval, tuple):
+            return len(previous.argval)
+    return 0
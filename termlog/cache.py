@@ -0,0 +1,116 @@
+"""Size bounded caches
+
+:class:`ByteLRU` keeps the most recently used strings up to a total
+size in bytes, rather than a number of entries, so that a few huge
+payloads cannot pin an unbounded amount of memory.
+
+"""
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+__all__ = ("ByteLRU", "CacheStats")
+
+
+@dataclass
+class CacheStats:
+    """Counters for a :class:`ByteLRU`
+
+    Attributes:
+        hits: lookups that found a value
+        misses: lookups that did not
+        evictions: values dropped to make room
+        entries: values currently held
+        size: bytes currently held
+        max_size: bytes the cache may hold
+
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size: int = 0
+    max_size: int = 0
+
+
+class ByteLRU:
+    """A thread-safe least recently used cache bounded by bytes
+
+    Args:
+        max_size: total bytes of values to keep; values larger than this
+            are never stored
+
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._values: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: dict = {}
+        self._size = 0
+        self._hits = self._misses = self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Looks *key* up, marking it as recently used.
+
+        Args:
+            key: cache key
+
+        Returns:
+            the cached value or None
+
+        """
+        with self._lock:
+            value = self._values.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._values.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        """Stores *value*, evicting the least recently used values as needed.
+
+        Args:
+            key: cache key
+            value: value to store
+            size: bytes to count for the entry, e.g. to include a large
+                key; the size of *value* when not provided
+
+        """
+        size = sys.getsizeof(value) if size is None else size
+        if size > self.max_size:
+            return
+        with self._lock:
+            if key in self._values:
+                self._size -= self._sizes.pop(key)
+                del self._values[key]
+            self._values[key] = value
+            self._sizes[key] = size
+            self._size += size
+            while self._size > self.max_size:
+                evicted, _ = self._values.popitem(last=False)
+                self._size -= self._sizes.pop(evicted)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drops every value and resets the counters."""
+        with self._lock:
+            self._values.clear()
+            self._sizes.clear()
+            self._size = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self) -> CacheStats:
+        """Snapshot of the cache's counters.
+
+        Returns:
+            stats
+
+        """
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, len(self._values), self._size, self.max_size)
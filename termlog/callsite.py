@@ -0,0 +1,173 @@
+"""Call-site caching
+
+Reading the caller's source and parsing it is by far the most expensive
+part of building a json message.  The names referenced at a call site
+never change for the lifetime of the code object running there, so they
+are extracted once and remembered here.
+
+Only the expression being executed is parsed: instruction positions
+(``co_positions``, Python 3.11+) give its exact extent within the source.
+Older interpreters fall back to parsing the whole enclosing function.
+
+Entries are keyed on the code object and instruction offset.  Code
+objects are held weakly: when a module is reloaded its functions get
+brand new code objects and the stale entries disappear along with the
+old ones.
+
+When the source cannot be found (e.g. pyc-only deployments), or when
+``bytecode_fields`` is configured, names are read from the bytecode with
+:mod:`termlog.bytecode` instead.
+
+"""
+import itertools
+import linecache
+import weakref
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Any, Dict, Optional, Tuple
+
+from . import bytecode
+from .config import _terminal_config
+from .frames import calling_frame
+from .interpret import extract_fields
+from .resolver import resolve_fields
+
+__all__ = ("CallSite", "call_source", "capture", "clear_cache", "field_names")
+
+_call_sites: "weakref.WeakKeyDictionary[CodeType, Dict[int, Tuple[str, ...]]]" = weakref.WeakKeyDictionary()
+_sourceless: "weakref.WeakSet[CodeType]" = weakref.WeakSet()
+
+
+def field_names(frame: FrameType, lasti: Optional[int] = None) -> Tuple[str, ...]:
+    """Names of the fields referenced by the code running in *frame*.
+
+    Args:
+        frame: the calling frame
+        lasti: instruction offset of the call, defaults to the current one
+
+    Returns:
+        field names in the order they were discovered
+
+    """
+    code = frame.f_code
+    lasti = frame.f_lasti if lasti is None else lasti
+    if _terminal_config.bytecode_fields or code in _sourceless:
+        names = bytecode.extract_fields(code, lasti)
+        if names is not None:
+            return names
+        elif code in _sourceless:
+            return ()
+    offsets = _call_sites.get(code)
+    if offsets is None:
+        offsets = _call_sites[code] = {}
+    names = offsets.get(lasti)
+    if names is None:
+        try:
+            source = call_source(frame, lasti)
+        except (OSError, TypeError, ValueError):
+            # ValueError: source changed on disk since it was imported
+            _sourceless.add(code)
+            return bytecode.extract_fields(code, lasti) or ()
+        try:
+            names = tuple(extract_fields(source))
+        except SyntaxError:
+            try:
+                names = tuple(extract_fields(_function_source(frame)))
+            except (OSError, TypeError, ValueError, SyntaxError):
+                names = bytecode.extract_fields(code, lasti) or ()
+        offsets[lasti] = names
+    return names
+
+
+def call_source(frame: FrameType, lasti: Optional[int] = None) -> str:
+    """Source of the expression being executed in *frame*.
+
+    Args:
+        frame: the calling frame
+        lasti: instruction offset of the call, defaults to the current one
+
+    Returns:
+        the expression's source, or the whole enclosing block's source
+        when instruction positions are not available
+
+    """
+    code = frame.f_code
+    lasti = frame.f_lasti if lasti is None else lasti
+    positions = None
+    if hasattr(code, "co_positions"):
+        positions = next(itertools.islice(code.co_positions(), lasti // 2, None), None)
+    if not positions or None in positions:
+        return _function_source(frame)
+
+    lineno, end_lineno, col_offset, end_col_offset = positions
+    lines = linecache.getlines(code.co_filename, frame.f_globals)
+    if len(lines) < end_lineno:
+        # e.g. the file was edited since it was imported
+        raise OSError("could not get source code")
+    # Column offsets count utf-8 bytes, not characters
+    segment = [line.encode("utf-8") for line in lines[lineno - 1 : end_lineno]]
+    segment[-1] = segment[-1][:end_col_offset]
+    segment[0] = segment[0][col_offset:]
+    return b"".join(segment).decode("utf-8")
+
+
+@dataclass(eq=False)
+class CallSite:
+    """A handle on the frame that called into termlog
+
+    Capturing a call site only keeps a reference to the frame and the
+    offset of the call being made, since the frame keeps running after
+    the call returns.  Reading
+    the referenced names and looking up their values is deferred until
+    :meth:`resolve` is called, which only happens when the fields are
+    actually rendered.  The frame is released once resolved.
+
+    Attributes:
+        frame: the calling frame, None once resolved
+        lasti: instruction offset of the call within the frame
+        fields: the resolved fields, None until resolved
+
+    """
+
+    frame: Optional[FrameType] = field(default=None, repr=False)
+    lasti: int = -1
+    fields: Optional[Dict[str, Any]] = None
+
+    def resolve(self) -> Dict[str, Any]:
+        """Resolves the fields referenced at the call site.
+
+        Returns:
+            field names mapped to their values within the calling frame
+
+        """
+        if self.fields is None:
+            fields: Dict[str, Any] = {}
+            frame, self.frame = self.frame, None
+            if frame is not None:
+                fields = resolve_fields(field_names(frame, self.lasti), frame)
+            self.fields = fields
+        return self.fields
+
+
+def capture() -> CallSite:
+    """Captures the first frame outside of termlog.
+
+    Returns:
+        an unresolved call site
+
+    """
+    frame = calling_frame()
+    return CallSite(frame=frame, lasti=frame.f_lasti if frame else -1)
+
+
+def clear_cache() -> None:
+    """Forget every cached call site."""
+    _call_sites.clear()
+    _sourceless.clear()
+
+
+def _function_source(frame: FrameType) -> str:
+    # inspect is slow to import and only needed on this fallback path
+    import inspect
+
+    return "".join(inspect.getsourcelines(frame)[0])
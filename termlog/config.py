@@ -11,6 +11,23 @@ class TerminalConfig:
         json: when True, display output as json
         timestamp: when True, include timestamp in output
         time_format: control how the timestamp appears in the output
+        infer_fields: when True, json output includes the fields referenced
+            by the calling code
+        bytecode_fields: when True, fields are read from the caller's
+            bytecode instead of its source
+        epoch_timestamps: when True, json timestamps are integer
+            nanoseconds since the epoch instead of *time_format*
+        json_backend: name of the json encoder backend, see
+            :mod:`termlog.encoding`
+        block_highlighting: when True, beautify highlights a message in
+            one pass instead of line by line
+        minimize_sgr: when True, colored output is rewritten with as few
+            escape sequences as possible, see :func:`termlog.sgr.minimize`
+        background: when True, echo queues messages for a writer thread
+            to format and write, see :mod:`termlog.dispatch`
+        queue_size: number of messages the background queue holds
+        queue_policy: what to do when the background queue is full:
+            block, drop-oldest, drop-newest or sample
 
     """
 
@@ -18,6 +35,15 @@ class TerminalConfig:
     json: bool = False
     time_format: str = "%Y%m%d%H%M%S"
     timestamp: Optional[bool] = None
+    infer_fields: bool = True
+    bytecode_fields: bool = False
+    epoch_timestamps: bool = False
+    json_backend: str = "json"
+    block_highlighting: bool = False
+    minimize_sgr: bool = False
+    background: bool = False
+    queue_size: int = 10_000
+    queue_policy: str = "block"
 
     def __getitem__(self, item):
         data = asdict(self)
@@ -32,7 +58,19 @@ _terminal_config = TerminalConfig()
 
 
 def set_config(
-    color: Optional[bool] = None, json: Optional[bool] = None, time_format: Optional[str] = None, timestamp: Optional[bool] = None,
+    color: Optional[bool] = None,
+    json: Optional[bool] = None,
+    time_format: Optional[str] = None,
+    timestamp: Optional[bool] = None,
+    infer_fields: Optional[bool] = None,
+    bytecode_fields: Optional[bool] = None,
+    epoch_timestamps: Optional[bool] = None,
+    json_backend: Optional[str] = None,
+    block_highlighting: Optional[bool] = None,
+    minimize_sgr: Optional[bool] = None,
+    background: Optional[bool] = None,
+    queue_size: Optional[int] = None,
+    queue_policy: Optional[str] = None,
 ) -> TerminalConfig:
     """Sets configuration for subsequent termlog API calls.
 
@@ -43,6 +81,15 @@ def set_config(
         json: True will enable json output
         time_format: Sets the timestamp format
         timestamp: True will enable timestamps on each log line
+        infer_fields: False will skip inspecting the caller for json fields
+        bytecode_fields: True will read json fields from the caller's bytecode
+        epoch_timestamps: True will use epoch nanoseconds as json timestamps
+        json_backend: Sets the json encoder backend (e.g. json, orjson)
+        block_highlighting: True will highlight whole messages in one pass
+        minimize_sgr: True will minimize the escape sequences of colored output
+        background: True will format and write echoed messages on a writer thread
+        queue_size: Sets the number of messages the background queue holds
+        queue_policy: Sets what happens when the background queue is full
 
     Returns:
         Updated configuration
@@ -57,4 +104,26 @@ def set_config(
         _terminal_config.time_format = time_format
     if timestamp is not None:
         _terminal_config.timestamp = timestamp
+    if infer_fields is not None:
+        _terminal_config.infer_fields = infer_fields
+    if bytecode_fields is not None:
+        _terminal_config.bytecode_fields = bytecode_fields
+    if epoch_timestamps is not None:
+        _terminal_config.epoch_timestamps = epoch_timestamps
+    if json_backend is not None:
+        _terminal_config.json_backend = json_backend
+    if block_highlighting is not None:
+        _terminal_config.block_highlighting = block_highlighting
+    if minimize_sgr is not None:
+        _terminal_config.minimize_sgr = minimize_sgr
+    if background is not None:
+        _terminal_config.background = background
+    if queue_size is not None:
+        _terminal_config.queue_size = queue_size
+    if queue_policy is not None:
+        from .dispatch import POLICIES
+
+        if queue_policy not in POLICIES:
+            raise ValueError(f"Unknown queue_policy `{queue_policy}`, expected one of {', '.join(POLICIES)}")
+        _terminal_config.queue_policy = queue_policy
     return _terminal_config
@@ -1,9 +1,9 @@
 import os
-from typing import Dict, Optional
+from typing import Mapping, Optional
 
 
 # This will get updated below, see: _true_color_supported
-def true_color_supported(env: Optional[Dict[str, str]] = None) -> bool:
+def true_color_supported(env: Optional[Mapping[str, str]] = None) -> bool:
     """Check if truecolor is supported by the current tty.
 
     Note: this currently only checks to see if COLORTERM contains
@@ -12,8 +12,7 @@ def true_color_supported(env: Optional[Dict[str, str]] = None) -> bool:
              - 24bit
 
     """
-    if env is None:
-        env = {k: v for k, v in os.environ.items()}
+    env = os.environ if env is None else env
     color_term = env.get("COLORTERM", "")
     return True if any(check in color_term for check in ["truecolor", "24bit"]) else False
 
@@ -0,0 +1,244 @@
+"""Background dispatch
+
+With ``set_config(background=True)``, :func:`termlog.echo` hands each
+call to a single writer thread instead of formatting and writing it on
+the caller's thread, so a slow stream (a pipe, a log driver) does not
+stall the caller.
+
+Everything that depends on the moment of the call is settled on the
+caller's thread before the record is queued: the configuration, the
+timestamp and, for json, the fields read from the calling frame.
+Formatting, highlighting and writing happen on the writer thread.  The
+messages themselves are queued by reference, so a mutable message that
+is changed right after the call may be rendered with the change.
+
+The queue is bounded by ``queue_size``.  When it is full, the
+``queue_policy`` decides:
+
+* ``block``: the caller waits for room
+* ``drop-oldest``: the oldest queued record makes room
+* ``drop-newest``: the new record is dropped
+* ``sample``: one in every :data:`SAMPLE_RATE` records arriving at a
+  full queue makes room by dropping the oldest, the others are dropped
+
+Errors (``severity`` at or above ``logging.ERROR``) are never dropped:
+they wait for room instead, and queued errors are passed over when the
+oldest record makes room.  When only errors are queued, new records
+wait as well.  Records are written in the order they were
+queued, so each thread's records keep their order.  Whatever is queued
+is written out at interpreter exit.
+
+"""
+import atexit
+import os
+import sys
+import threading
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import IO, Deque, List, Optional, Union
+
+from .config import _terminal_config
+from .message import Message
+from .sinks import ERROR, BufferedSink
+
+__all__ = ("DispatchStats", "POLICIES", "Record", "SAMPLE_RATE", "drain", "stats", "submit")
+
+POLICIES = ("block", "drop-oldest", "drop-newest", "sample")
+SAMPLE_RATE = 10
+
+
+@dataclass
+class DispatchStats:
+    """Counters for background dispatch
+
+    Attributes:
+        queued: records accepted into the queue
+        written: records formatted and written
+        dropped: records dropped because the queue was full
+        pending: records currently queued
+
+    """
+
+    queued: int = 0
+    written: int = 0
+    dropped: int = 0
+    pending: int = 0
+
+
+@dataclass
+class Record:
+    """A call to echo, waiting to be formatted and written
+
+    Attributes:
+        messages: prepared messages, see ``formatting._prepare``
+        file: stream to write to
+        end: text to write after the message
+        flush: whether to flush after writing; None for the default
+        severity: logging level of the message
+
+    """
+
+    messages: List[Message]
+    file: Union[IO, BufferedSink]
+    end: str = "\n"
+    flush: Optional[bool] = None
+    severity: int = 0
+
+
+class _Dispatcher:
+    def __init__(self) -> None:
+        self._records: Deque[Record] = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        # Records taken off the queue but not written yet
+        self._busy = 0
+        self._arrivals = 0
+        self._stats = DispatchStats()
+
+    def submit(self, record: Record) -> None:
+        with self._lock:
+            max_size = max(int(_terminal_config.queue_size), 1)
+            policy = _terminal_config.queue_policy
+            if len(self._records) >= max_size:
+                error = record.severity >= ERROR
+                if not error and policy == "drop-newest":
+                    self._stats.dropped += 1
+                    return
+                if not error and policy == "sample":
+                    self._arrivals += 1
+                    if self._arrivals % SAMPLE_RATE:
+                        self._stats.dropped += 1
+                        return
+                if error or policy not in ("drop-oldest", "sample") or not self._evict():
+                    # Blocking, an error, or nothing but errors queued
+                    while len(self._records) >= max_size:
+                        self._start()
+                        self._not_full.wait()
+            else:
+                # Sampling starts over with every overflow
+                self._arrivals = 0
+            self._records.append(record)
+            self._stats.queued += 1
+            self._start()
+            self._not_empty.notify()
+
+    def _evict(self) -> bool:
+        # Drops the oldest queued record that is not an error
+        for index, queued in enumerate(self._records):
+            if queued.severity < ERROR:
+                del self._records[index]
+                self._stats.dropped += 1
+                return True
+        return False
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._records:
+                self._start()
+            return self._idle.wait_for(lambda: not self._records and not self._busy, timeout)
+
+    def stats(self) -> DispatchStats:
+        with self._lock:
+            return DispatchStats(self._stats.queued, self._stats.written, self._stats.dropped, len(self._records))
+
+    def reset(self) -> None:
+        # In a forked child: the writer thread did not survive the fork
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._thread = None
+        self._busy = 0
+        # ... and the parent writes out what was queued
+        self._records = deque()
+
+    def _start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="termlog-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        from .formatting import _render
+
+        while True:
+            with self._lock:
+                while not self._records:
+                    self._idle.notify_all()
+                    self._not_empty.wait()
+                # Everything queued so far is written in one go
+                records = list(self._records)
+                self._records.clear()
+                self._busy = len(records)
+                self._not_full.notify_all()
+            flush = {}
+            for record in records:
+                try:
+                    _write(record, _render(record.messages))
+                except Exception:
+                    traceback.print_exc(file=sys.__stderr__)
+                if record.flush or (record.flush is None and not isinstance(record.file, BufferedSink)):
+                    flush[id(record.file)] = record.file
+            # Streams are flushed once per batch rather than once per record
+            for file in flush.values():
+                try:
+                    file.flush()
+                except Exception:
+                    traceback.print_exc(file=sys.__stderr__)
+            with self._lock:
+                self._busy = 0
+                self._stats.written += len(records)
+
+
+def _write(record: Record, string: str) -> None:
+    file = record.file
+    if isinstance(file, BufferedSink):
+        file.write(f"{string}{record.end}", severity=record.severity)
+    else:
+        file.write(f"{string}{record.end}")
+
+
+_dispatcher = _Dispatcher()
+
+
+def submit(record: Record) -> None:
+    """Queues *record* for the writer thread.
+
+    Args:
+        record: the call to write out
+
+    """
+    _dispatcher.submit(record)
+
+
+def drain(timeout: Optional[float] = None) -> bool:
+    """Waits until every queued record is written.
+
+    Args:
+        timeout: seconds to wait at most; None to wait until done
+
+    Returns:
+        True when the queue was drained in time
+
+    """
+    return _dispatcher.drain(timeout)
+
+
+def stats() -> DispatchStats:
+    """Snapshot of the dispatch counters.
+
+    Returns:
+        stats
+
+    """
+    return _dispatcher.stats()
+
+
+# Runs before the buffered sinks are flushed at exit, since this module
+#  is always imported after termlog.sinks
+atexit.register(drain)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispatcher.reset)
@@ -0,0 +1,158 @@
+"""Json encoding
+
+Values the json module cannot serialize are dispatched by type to an
+encoder from a registry.  The encoder chosen for a type is cached, so
+each value costs a dict lookup instead of a try/except.  The default
+encoders reproduce termlog's historical output byte for byte: dataclasses
+become objects and everything else becomes its ``str()``.
+
+Example:
+    >>> import termlog.encoding
+    >>> termlog.encoding.register(set, sorted)
+    >>> termlog.encoding.dumps({"ids": {3, 1, 2}})
+    '{"ids": [1, 2, 3]}'
+
+Two backends are available: ``json`` (stdlib, the default) and
+``orjson``, selected with ``set_config(json_backend="orjson")``, which
+falls back to the stdlib when orjson is not installed.  orjson's output
+is compact and it renders enums by value, so it is not byte-identical to
+the stdlib.
+
+"""
+import dataclasses
+import datetime
+import enum
+import functools
+import json
+from pathlib import PurePath
+from typing import Any, Callable, Dict, Optional, Type
+
+from .config import _terminal_config
+
+__all__ = ("default", "dumps", "register", "register_backend")
+
+Encoder = Callable[[Any], Any]
+
+_encoders: Dict[Type, Encoder] = {
+    datetime.date: str,
+    datetime.time: str,
+    datetime.timedelta: str,
+    PurePath: str,
+    enum.Enum: str,
+    bytes: str,
+    bytearray: str,
+    set: str,
+    frozenset: str,
+    BaseException: str,
+}
+_backends: Dict[str, Callable[[Any], str]] = {}
+
+
+def register(cls: Type, encoder: Encoder) -> None:
+    """Registers *encoder* for *cls* and its subclasses.
+
+    Args:
+        cls: the type to encode
+        encoder: returns a json serializable replacement for a value
+
+    """
+    _encoders[cls] = encoder
+    encoder_for.cache_clear()
+
+
+def encode_dataclass(obj: Any) -> Dict[str, Any]:
+    # shallow: json calls back in for anything nested
+    return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+
+
+@functools.lru_cache(maxsize=1024)
+def encoder_for(cls: Type) -> Encoder:
+    """Finds the encoder for *cls*, searching its method resolution order.
+
+    Args:
+        cls: type of the value being encoded
+
+    Returns:
+        encoder
+
+    """
+    for base in cls.__mro__:
+        if base in _encoders:
+            return _encoders[base]
+    if dataclasses.is_dataclass(cls):
+        return encode_dataclass
+    return str
+
+
+def default(obj: Any) -> Any:
+    """``default`` hook for json encoders.
+
+    Args:
+        obj: a value json cannot serialize
+
+    Returns:
+        json serializable replacement for *obj*
+
+    """
+    return encoder_for(type(obj))(obj)  # type: ignore[arg-type]
+
+
+def register_backend(name: str, dumps: Callable[[Any], str]) -> None:
+    """Registers a json backend selectable with ``set_config(json_backend=name)``.
+
+    Args:
+        name: backend name
+        dumps: serializes data to a json string, using :func:`default`
+
+    """
+    _backends[name] = dumps
+
+
+def dumps(data: Any) -> str:
+    """Serializes *data* with the configured backend.
+
+    Args:
+        data: data to serialize
+
+    Returns:
+        json string
+
+    """
+    backend = _backends.get(_terminal_config.json_backend, _backends["json"])
+    return backend(data)
+
+
+def _stdlib_dumps(data: Any) -> str:
+    return json.dumps(data, default=default)
+
+
+def _orjson_dumps(data: Any) -> str:
+    global _orjson_backend
+    if _orjson_backend is None:
+        _orjson_backend = _load_orjson()
+    return _orjson_backend(data)
+
+
+def _load_orjson() -> Callable[[Any], str]:
+    # Imported on first use rather than with termlog
+    try:
+        import orjson
+    except ImportError:
+        return _stdlib_dumps
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def dumps(data: Any) -> str:
+        try:
+            return orjson.dumps(data, default=default, option=options).decode("utf-8")
+        except TypeError:
+            # e.g. integers wider than 64 bits
+            return _stdlib_dumps(data)
+
+    return dumps
+
+
+_orjson_backend: Optional[Callable[[Any], str]] = None
+
+register_backend("json", _stdlib_dumps)
+register_backend("orjson", _orjson_dumps)
@@ -1,38 +1,76 @@
+import sys
 import textwrap
 from pathlib import Path
-from typing import Any, Optional, Union
-
-import pygments
-from pygments.formatters import get_formatter_by_name
-from pygments.lexer import Lexer
-from pygments.lexers import get_lexer_by_name, guess_lexer
+from typing import TYPE_CHECKING, Any, Hashable, List, Mapping, Optional, Sequence, Union
 
+from .cache import ByteLRU
+from .callsite import capture
 from .config import _terminal_config
 from .message import Message
 
-__all__ = ("beautify", "format")
+if TYPE_CHECKING:  # pragma: no cover
+    from pygments.lexer import Lexer
+
+__all__ = ("beautify", "format", "highlight_cache")
+
+# Beautified strings, keyed by the message, the lexer, indent and
+#  highlighting mode; the message counts towards the size as well
+highlight_cache = ByteLRU(max_size=16 * 1024 * 1024)
 
 
-def beautify(message: Any, indent: int = 0, lexer: Optional[Union[pygments.lexer.Lexer, str]] = None) -> str:
+def beautify(message: Any, indent: int = 0, lexer: Optional[Union["Lexer", str]] = None, block: Optional[bool] = None) -> str:
     """Beautify *message*.
 
     Args:
         message: message to beautify
         indent: number of spaces to indent
         lexer: message lexical analyzer
+        block: when True, highlight the message in one pass instead of
+            line by line; each line still carries its own colors
 
     Returns:
         str: beautified message
 
     """
-    formatter = get_formatter_by_name("16m")
-
+    block = block if block is not None else _terminal_config.block_highlighting
     indent = max(int(indent or 0), 0)
     if isinstance(message, Path):
         message = str(message)
     elif isinstance(message, bytes):
         message = message.decode("utf-8")
 
+    key = _highlight_key(message, indent, lexer, block)
+    if key is not None:
+        cached = highlight_cache.get(key)
+        if cached is not None:
+            return cached
+    beautified = _beautify(message, indent, lexer, block)
+    if key is not None:
+        highlight_cache.put(key, beautified, sys.getsizeof(message) + sys.getsizeof(beautified))
+    return beautified
+
+
+def _highlight_key(message: Any, indent: int, lexer: Any, block: bool) -> Optional[Hashable]:
+    if not isinstance(message, str):
+        return None
+    if lexer is not None and not isinstance(lexer, str):
+        lexer = (type(lexer), tuple(sorted(getattr(lexer, "options", {}).items())))
+    key = (message, lexer, indent, block)
+    try:
+        hash(key)
+    except TypeError:
+        # e.g. a lexer with a list of filters
+        return None
+    return key
+
+
+def _beautify(message: Any, indent: int, lexer: Optional[Union["Lexer", str]], block: bool) -> Any:
+    # pygments is only imported once something is highlighted
+    from .lexers import formatter_for, guess_lexer, lexer_for
+    from .sgr import highlight
+
+    formatter = formatter_for("16m")
+
     single = False
     if isinstance(message, str):
         single = len(message) - len(message.rstrip("\n")) == 0
@@ -40,16 +78,23 @@ def beautify(message: Any, indent: int = 0, lexer: Optional[Union[pygments.lexer
     if isinstance(message, Exception):
         lexer = lexer or "py3tb"
 
-    if isinstance(lexer, str):
-        lexer = get_lexer_by_name(lexer)
-
-    if not lexer and isinstance(message, str):
-        lexer = guess_lexer(message, stripall=True) if lexer is None else lexer
-
-    if lexer and isinstance(message, str):
+    active: Optional["Lexer"] = lexer_for(lexer) if isinstance(lexer, str) else lexer
+    if active is None and isinstance(message, str):
+        active = guess_lexer(message)
+
+    if active and isinstance(message, str) and block:
+        # Multi-line tokens (strings, docstrings) are lexed correctly.  The
+        #  lexer drops surrounding newlines, so they're put back afterwards
+        body = message.strip("\n")
+        leading = message[: message.index(body)] if body else ""
+        trailing = message[len(leading) + len(body) :]
+        #  Each line closes its own colors
+        highlighted = highlight(active.get_tokens(body), formatter).rstrip("\n") if body else ""
+        message = leading + highlighted + trailing
+    elif active and isinstance(message, str):
         messages = message.split("\n")
         for index, message in enumerate(messages):
-            message = pygments.highlight(message, lexer, formatter)
+            message = highlight(active.get_tokens(message), formatter)
             messages[index] = message.rstrip("\n")
         message = "\n".join(messages)
     if indent > 0:
@@ -59,11 +104,12 @@ def beautify(message: Any, indent: int = 0, lexer: Optional[Union[pygments.lexer
 
 def format(
     *messages: Any,
-    lexer: Optional[Union[Lexer, str]] = None,
-    color: bool = None,
-    json: bool = None,
+    lexer: Optional[Union["Lexer", str]] = None,
+    color: Optional[bool] = None,
+    json: Optional[bool] = None,
     time_format: Optional[str] = None,
     add_timestamp: Optional[bool] = None,
+    fields: Optional[Mapping[str, Any]] = None,
 ) -> str:
     """Creates *message*, but does not echo it to a stdout, log, or other
 
@@ -77,18 +123,37 @@ def format(
         json: Dump out a structured text
         time_format: control time format
         add_timestamp: add a timestamp to the output
+        fields: structured fields for json output; when provided, the
+            fields are not inferred from the calling code
 
     Returns:
         Tuple[str]: beautified messages
 
     """
+    prepared = _prepare(*messages, lexer=lexer, color=color, json=json, time_format=time_format, add_timestamp=add_timestamp, fields=fields)
+    return _render(prepared)
+
+
+def _prepare(
+    *messages: Any,
+    lexer: Optional[Union["Lexer", str]] = None,
+    color: Optional[bool] = None,
+    json: Optional[bool] = None,
+    time_format: Optional[str] = None,
+    add_timestamp: Optional[bool] = None,
+    fields: Optional[Mapping[str, Any]] = None,
+) -> List[Message]:
+    # Everything tied to the moment of the call: configuration,
+    #  timestamps and the call site
     time_format = time_format if time_format is not None else _terminal_config.time_format
     add_timestamp = add_timestamp if add_timestamp is not None else _terminal_config.timestamp
     json = json if json is not None else _terminal_config.json
     color = color if color is not None else _terminal_config.color
+    # Fields are only rendered as json; one capture is shared by all messages
+    infer_fields = bool(json) and fields is None and _terminal_config.infer_fields
+    call_site = capture() if infer_fields else None
 
-    # Allows echo to be used in settings and prevents circular dependencies
-    string = ""
+    prepared = []
     for index, message in enumerate(messages):
         include_timestamp = False
         if add_timestamp is True:
@@ -105,11 +170,27 @@ def format(
             color=bool(color),
             time_format=time_format,
             include_timestamp=include_timestamp,
+            fields=dict(fields or {}),
+            infer_fields=infer_fields,
+            call_site=call_site,
+            epoch_timestamp=bool(json) and _terminal_config.epoch_timestamps,
         )
-        separator = ("\n" if json else " ") if string else ""
+        prepared.append(msg)
+    return prepared
+
+
+def _render(messages: Sequence[Message]) -> str:
+    # Allows echo to be used in settings and prevents circular dependencies
+    string = ""
+    for msg in messages:
+        separator = ("\n" if msg.json else " ") if string else ""
         try:
             string = f"{string}{separator}{msg}"
         except TypeError:
             msg.fields = {}
             string = f"{string}{separator}{msg}"
+    if messages and messages[0].color and not messages[0].json and _terminal_config.minimize_sgr:
+        from .sgr import minimize
+
+        string = minimize(string)
     return string
@@ -0,0 +1,60 @@
+"""Frame walking
+
+Locates the frame that called into termlog by following ``f_back``
+directly.  Unlike ``inspect.getouterframes`` nothing here builds
+``FrameInfo`` objects or touches ``linecache``; each frame is classified
+by its code object and the answer is cached, so a deep stack only costs a
+pointer chase per frame and the walk stops at the first external caller.
+
+"""
+import os
+import sys
+import weakref
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Optional
+
+__all__ = ("calling_frame", "is_internal")
+
+# With a trailing separator, so that e.g. termlog_plugins is not internal
+_package_path = os.path.join(str(Path(__file__).parent), "")
+_tests_path = os.path.join(str(Path(__file__).parent / "tests"), "")
+
+_internal_codes: "weakref.WeakKeyDictionary[CodeType, bool]" = weakref.WeakKeyDictionary()
+
+
+def is_internal(code: CodeType) -> bool:
+    """Checks if *code* belongs to termlog itself.
+
+    Termlog's own tests are treated as external so that they can
+    exercise the library the same way an application would.
+
+    Args:
+        code: code object of the frame to classify
+
+    Returns:
+        True if the code is internal to termlog
+
+    """
+    internal = _internal_codes.get(code)
+    if internal is None:
+        filename = code.co_filename
+        internal = filename.startswith(_package_path) and not filename.startswith(_tests_path)
+        _internal_codes[code] = internal
+    return internal
+
+
+def calling_frame(frame: Optional[FrameType] = None) -> Optional[FrameType]:
+    """Finds the first frame outside of termlog.
+
+    Args:
+        frame: frame to start from, defaults to the frame calling this
+
+    Returns:
+        the first external frame or None if the whole stack is internal
+
+    """
+    frame = sys._getframe(1) if frame is None else frame
+    while frame is not None and is_internal(frame.f_code):
+        frame = frame.f_back
+    return frame
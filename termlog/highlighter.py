@@ -0,0 +1,196 @@
+"""Incremental highlighting
+
+:class:`StreamingHighlighter` highlights text that arrives in chunks,
+e.g. a large document read from a pipe, and hands back each colored line
+as soon as its newline arrives.  Only the incomplete last line and the
+lexer's state are kept between chunks, so memory is bounded by the
+longest line rather than by the size of the document.  A document with
+no newlines at all (e.g. minified json) is therefore held in full until
+:meth:`StreamingHighlighter.close`.
+
+Regex based lexers (most of pygments') carry their state stack from one
+chunk to the next, so constructs spanning lines such as strings or block
+comments are colored correctly.  Other lexers (e.g. json) start afresh
+with the lines completed by every chunk, which is only correct where no
+token spans those lines; json strings never do.
+
+"""
+import codecs
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+from pygments.lexer import ExtendedRegexLexer, Lexer, LexerContext, RegexLexer
+from pygments.token import Error, Whitespace, _TokenType
+
+from .lexers import SAMPLE_SIZE, formatter_for, guess_lexer, lexer_for
+from .sgr import highlight
+
+__all__ = ("StreamingHighlighter",)
+
+Token = Tuple[Any, str]
+
+
+class StreamingHighlighter:
+    """Highlights text chunk by chunk, one complete line at a time
+
+    Example:
+        >>> highlighter = StreamingHighlighter(lexer="json")
+        >>> for chunk in iter(lambda: stream.read(65536), ""):
+        ...     for line in highlighter.feed(chunk):
+        ...         print(line)
+        >>> for line in highlighter.close():
+        ...     print(line)
+
+    Args:
+        lexer: message lexical analyzer; guessed from the first lines
+            when not provided
+        indent: number of spaces to indent each line
+        formatter: terminal formatter providing the colors
+
+    """
+
+    def __init__(self, lexer: Optional[Union[Lexer, str]] = None, indent: int = 0, formatter: Any = "16m") -> None:
+        self.lexer: Optional[Lexer] = lexer_for(lexer) if isinstance(lexer, str) else lexer
+        self.formatter = formatter_for(formatter) if isinstance(formatter, str) else formatter
+        self.indent = " " * max(int(indent or 0), 0)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial: List[str] = []
+        # Complete lines held back until there's enough text to guess from
+        self._unguessed: List[str] = []
+        self._unguessed_size = 0
+        self._context: Optional[LexerContext] = None
+
+    def feed(self, chunk: Union[str, bytes]) -> List[str]:
+        """Highlights the lines completed by *chunk*.
+
+        Args:
+            chunk: the next piece of text; bytes are decoded as UTF-8,
+                even when a character is split between chunks
+
+        Returns:
+            colored lines, without newlines
+
+        """
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = self._decoder.decode(chunk)
+        if "\n" not in chunk:
+            self._partial.append(chunk)
+            return []
+        self._partial.append(chunk)
+        lines = "".join(self._partial).split("\n")
+        last = lines.pop()
+        self._partial = [last] if last else []
+        return list(self._highlight_lines(lines))
+
+    def close(self) -> List[str]:
+        """Highlights whatever is left and resets the lexer state.
+
+        Returns:
+            colored lines, without newlines
+
+        """
+        tail = self._decoder.decode(b"", final=True)
+        rest = "".join(self._partial) + tail
+        self._partial = []
+        lines = list(self._highlight_lines([rest] if rest else [], final=True))
+        self._context = None
+        return lines
+
+    def _highlight_lines(self, lines: List[str], final: bool = False) -> Iterator[str]:
+        if self.lexer is None:
+            self._unguessed.extend(lines)
+            self._unguessed_size += sum(len(line) + 1 for line in lines)
+            if self._unguessed_size < SAMPLE_SIZE and not final:
+                return
+            lines, self._unguessed, self._unguessed_size = self._unguessed, [], 0
+            if not lines:
+                return
+            self.lexer = guess_lexer("\n".join(lines))
+        lines = [line[:-1] if line.endswith("\r") else line for line in lines]
+        # Lines completed by the same chunk are lexed together; lexers
+        #  expect every line to end with a newline
+        colored = highlight(self._tokens("\n".join(lines) + "\n"), self.formatter).split("\n")
+        for line, colored_line in zip(lines, colored):
+            # Like textwrap.indent, blank lines are not indented
+            yield f"{self.indent}{colored_line}" if line.strip() else colored_line
+
+    def _tokens(self, text: str) -> Iterator[Token]:
+        lexer = self.lexer
+        if not isinstance(lexer, RegexLexer):
+            return ((token_type, value) for _, token_type, value in lexer.get_tokens_unprocessed(text))  # type: ignore
+        if self._context is None:
+            self._context = _new_context(lexer)
+        context = self._context
+        context.text, context.pos, context.end = text, 0, len(text)
+        return _lex(lexer, context)
+
+
+def _new_context(lexer: Lexer) -> LexerContext:
+    # The yaml lexer keeps its indentation in its own context
+    from pygments.lexers.data import YamlLexer, YamlLexerContext
+
+    if isinstance(lexer, YamlLexer):
+        return YamlLexerContext("", 0)
+    return LexerContext("", 0)
+
+
+def _lex(lexer: RegexLexer, context: LexerContext) -> Iterator[Token]:
+    """``RegexLexer.get_tokens_unprocessed``, continuing from the state
+    stack in *context* and leaving it where the text ends.
+
+    Unlike pygments, no rule is tried at the end of the text: there, a
+    rule may only match nothing, typically to leave a state because the
+    line it looks ahead to is not there yet.
+
+    """
+    extended = isinstance(lexer, ExtendedRegexLexer)
+    tokendefs = lexer._tokens
+    text, end = context.text, context.end
+    statetokens = tokendefs[context.stack[-1]]
+    while context.pos < end:
+        for rexmatch, action, new_state in statetokens:
+            match = rexmatch(text, context.pos, end)
+            if match:
+                if action is not None:
+                    if type(action) is _TokenType:
+                        yield action, match.group()
+                    elif extended:
+                        # the callback moves the position itself
+                        for _, token_type, value in action(lexer, match, context):
+                            yield token_type, value
+                        if not new_state:
+                            statetokens = tokendefs[context.stack[-1]]
+                    else:
+                        for _, token_type, value in action(lexer, match):
+                            yield token_type, value
+                if not extended or type(action) is _TokenType or action is None:
+                    context.pos = match.end()
+                if new_state is not None:
+                    stack = context.stack
+                    if isinstance(new_state, tuple):
+                        for state in new_state:
+                            if state == "#pop":
+                                if len(stack) > 1:
+                                    stack.pop()
+                            elif state == "#push":
+                                stack.append(stack[-1])
+                            else:
+                                stack.append(state)
+                    elif isinstance(new_state, int):
+                        # pop, but keep at least one state on the stack
+                        if abs(new_state) >= len(stack):
+                            del stack[1:]
+                        else:
+                            del stack[new_state:]
+                    elif new_state == "#push":
+                        stack.append(stack[-1])
+                    statetokens = tokendefs[stack[-1]]
+                break
+        else:
+            if text[context.pos] == "\n":
+                # at EOL, reset state to "root"
+                context.stack = ["root"]
+                statetokens = tokendefs["root"]
+                yield Whitespace, "\n"
+            else:
+                yield Error, text[context.pos]
+            context.pos += 1
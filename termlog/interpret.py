@@ -1,7 +1,133 @@
 """Interprets each AST node"""
 import ast
 import textwrap
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence, Set
+
+
+class FieldExtractor(ast.NodeVisitor):
+    """Collects the names a block of code reads as values
+
+    Every node is visited at most once.  Only names that are loaded are
+    collected, and the following are skipped on purpose:
+
+    * the function being called and its keyword arguments; ``echo(x,
+      json=flag)`` is about ``x``, not ``echo`` or ``flag``
+    * assignment targets, imports, asserts, raises and deletes
+    * the exception types caught by ``except`` clauses
+    * names bound by comprehensions and lambdas, which are not visible
+      to the calling frame
+
+    Attribute chains on a name are collected whole: ``echo(user.id)``
+    yields ``user.id``, which :mod:`termlog.resolver` looks up.
+
+    Attributes:
+        fields: names found, in the order they were first seen
+
+    """
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, Any] = {}
+        self._bound: List[Set[str]] = []
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load) and not any(node.id in bound for bound in self._bound):
+            self.fields.setdefault(node.id, None)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        path = [node.attr]
+        value = node.value
+        while isinstance(value, ast.Attribute):
+            path.append(value.attr)
+            value = value.value
+        if not isinstance(value, ast.Name) or not isinstance(node.ctx, ast.Load):
+            self.generic_visit(node)
+        elif not any(value.id in bound for bound in self._bound):
+            path.append(value.id)
+            self.fields.setdefault(".".join(reversed(path)), None)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        for arg in node.args:
+            self.visit(arg)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        self.visit(node.value)
+
+    def visit_AugAssign(self, node: ast.AugAssign) -> None:
+        self.visit(node.value)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        if node.value is not None:
+            self.visit(node.value)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._visit_all(node.body)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        self._visit_all(node.body)
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._visit_all(node.body)
+
+    def visit_For(self, node: ast.For) -> None:
+        self.visit(node.iter)
+        self._visit_all(node.body)
+        self._visit_all(node.orelse)
+
+    def visit_AsyncFor(self, node: ast.AsyncFor) -> None:
+        self.visit(node.iter)
+        self._visit_all(node.body)
+        self._visit_all(node.orelse)
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        self._visit_all(node.body)
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        pass
+
+    def visit_ListComp(self, node: ast.ListComp) -> None:
+        self._visit_comprehension([node.elt], node.generators)
+
+    def visit_SetComp(self, node: ast.SetComp) -> None:
+        self._visit_comprehension([node.elt], node.generators)
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp) -> None:
+        self._visit_comprehension([node.elt], node.generators)
+
+    def visit_DictComp(self, node: ast.DictComp) -> None:
+        self._visit_comprehension([node.key, node.value], node.generators)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        pass
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        pass
+
+    def visit_Assert(self, node: ast.Assert) -> None:
+        pass
+
+    def visit_Raise(self, node: ast.Raise) -> None:
+        pass
+
+    def visit_Delete(self, node: ast.Delete) -> None:
+        pass
+
+    def _visit_all(self, nodes: Sequence[ast.AST]) -> None:
+        for node in nodes:
+            self.visit(node)
+
+    def _visit_comprehension(self, elements: List[ast.expr], generators: List[ast.comprehension]) -> None:
+        # The first iterable is evaluated in the enclosing scope
+        self.visit(generators[0].iter)
+        bound = {target.id for generator in generators for target in ast.walk(generator.target) if isinstance(target, ast.Name)}
+        self._bound.append(bound)
+        try:
+            for index, generator in enumerate(generators):
+                if index:
+                    self.visit(generator.iter)
+                self._visit_all(generator.ifs)
+            self._visit_all(elements)
+        finally:
+            self._bound.pop()
 
 
 def extract_fields(code: str) -> Dict[str, Any]:
@@ -13,67 +139,6 @@ def extract_fields(code: str) -> Dict[str, Any]:
     # Parsing expects that the code have no indentation
     code = textwrap.dedent(code)
     parsed = ast.parse(code)
-    queue: List[Any] = parsed.body
-    data = []
-    fields: Dict[str, Any] = {}
-    # Grab field names to get data needed for message
-    count = -1
-    while queue:
-        count += 1
-        node = queue.pop(0)
-        ignored = tuple([ast.ImportFrom, ast.Import, ast.Assert, ast.Raise])
-        unhandled = tuple(
-            [
-                ast.Constant,
-                ast.Dict,
-                ast.DictComp,
-                ast.Expr,
-                ast.GeneratorExp,
-                ast.For,
-                ast.List,
-                ast.ListComp,
-                ast.Return,
-                ast.Subscript,
-                ast.Try,
-                ast.With,
-            ]
-        )
-        if isinstance(node, (list, tuple)):
-            queue.extend(node)
-        elif isinstance(node, (ast.Expr, ast.FormattedValue, ast.Assign, ast.Starred, ast.Attribute, ast.Subscript, ast.AnnAssign)):
-            queue.append(node.value)
-        elif isinstance(node, (ast.Call,)):
-            queue.extend(node.args)
-        elif isinstance(node, (ast.JoinedStr, ast.BoolOp)):
-            queue.extend(node.values)
-        elif isinstance(node, (ast.Str,)):
-            data.append(node.s)
-        elif isinstance(node, (ast.Name,)):
-            fields.update({node.id: None})
-        elif isinstance(node, (ast.BinOp,)):
-            queue.append(node.left)
-            queue.append(node.right)
-        elif isinstance(node, (ast.FunctionDef,)):
-            queue.extend(node.body)
-        elif isinstance(node, (ast.If, ast.IfExp)):
-            queue.append(node.body)
-            queue.append(node.orelse)
-        # elif isinstance(node, (ast.DictComp,)):
-        #     queue.extend(node.generators)
-        #     queue.append(node.key)
-        #     queue.append(node.value)
-        # elif isinstance(node, (ast.Try,)):
-        #     queue.extend(node.body)
-        #     queue.extend(node.orelse)
-        #     queue.extend(node.finalbody)
-        elif isinstance(node, ignored):
-            pass
-        elif isinstance(node, unhandled):
-            # print("Termlog Warning [Debug ast.Node]:", node, ", ".join([d for d in dir(node) if not d.startswith("_")]))
-            pass
-        else:
-            print("Termlog Warning [Unhandled ast.Node]:", node, ", ".join([d for d in dir(node) if not d.startswith("_")]))
-
-        if count > 4096:  # to prevent a runaway queue
-            break
-    return fields
+    extractor = FieldExtractor()
+    extractor.visit(parsed)
+    return extractor.fields
@@ -0,0 +1,273 @@
+"""Lexer and formatter lookup
+
+Looking a lexer or formatter up by name goes through pygments' plugin
+machinery and builds a new instance every time.  Instances are cached
+here by name and options instead; both are safe to share between threads
+since highlighting does not mutate them.  Each is built once, even when
+several threads ask for it at the same time.
+
+Guessing a lexer with pygments runs every registered lexer's
+``analyse_text`` over the whole text.  :func:`guess_lexer` only looks at
+a bounded prefix, tries a few cheap structural detectors before asking
+pygments, stops asking once its time budget is spent and remembers its
+guess for each prefix.  A guess cut short by the time budget depends on
+how busy the machine was, so it is not remembered.
+
+"""
+import functools
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pygments.formatter import Formatter
+from pygments.formatters import get_formatter_by_name
+from pygments.lexer import Lexer
+from pygments.lexers import _iter_lexerclasses, get_lexer_by_name
+from pygments.lexers.special import TextLexer
+from pygments.modeline import get_filetype_from_buffer
+from pygments.util import ClassNotFound
+
+__all__ = ("cache_info", "clear_cache", "formatter_for", "guess_lexer", "lexer_for")
+
+SAMPLE_SIZE = 4096
+GUESS_TIMEOUT = 0.05
+MAX_GUESSES = 1024
+
+_guesses: "OrderedDict[int, Lexer]" = OrderedDict()
+_guesses_lock = threading.Lock()
+# Makes concurrent misses wait for the first one instead of each building
+#  an instance
+_build_lock = threading.Lock()
+
+Options = Tuple[Tuple[str, Any], ...]
+
+
+def lexer_for(name: str, **options: Any) -> Lexer:
+    """Finds the shared lexer for *name* and *options*.
+
+    Args:
+        name: lexer alias, e.g. ``json``
+        options: lexer options
+
+    Returns:
+        lexer
+
+    """
+    key = _key(options)
+    if key is None:
+        return get_lexer_by_name(name, **options)
+    with _build_lock:
+        return _lexer(name, key)
+
+
+def formatter_for(name: str, **options: Any) -> Formatter:
+    """Finds the shared formatter for *name* and *options*.
+
+    Args:
+        name: formatter alias, e.g. ``16m``
+        options: formatter options
+
+    Returns:
+        formatter
+
+    """
+    key = _key(options)
+    if key is None:
+        return get_formatter_by_name(name, **options)
+    with _build_lock:
+        return _formatter(name, key)
+
+
+def guess_lexer(text: str, sample_size: int = SAMPLE_SIZE, timeout: Optional[float] = GUESS_TIMEOUT) -> Lexer:
+    """Guesses the lexer for *text* from its first *sample_size* characters.
+
+    Args:
+        text: text to guess the lexer for
+        sample_size: number of leading characters to look at
+        timeout: seconds pygments may spend scoring lexers before the
+            best guess so far is used; None for no limit
+
+    Returns:
+        lexer, which strips surrounding whitespace like
+        ``pygments.lexers.guess_lexer(text, stripall=True)``
+
+    """
+    sample = text[:sample_size]
+    fingerprint = hash(sample)
+    with _guesses_lock:
+        lexer = _guesses.get(fingerprint)
+        if lexer is not None:
+            _guesses.move_to_end(fingerprint)
+            return lexer
+    lexer, complete = _guess_lexer(sample, timeout)
+    if not complete:
+        return lexer
+    with _guesses_lock:
+        _guesses[fingerprint] = lexer
+        if len(_guesses) > MAX_GUESSES:
+            _guesses.popitem(last=False)
+    return lexer
+
+
+def cache_info() -> Dict[str, Any]:
+    """Hit and miss counters for each cache.
+
+    Returns:
+        cache names mapped to their ``functools`` cache info
+
+    """
+    return {"lexers": _lexer.cache_info(), "formatters": _formatter.cache_info()}
+
+
+def clear_cache() -> None:
+    """Drops all cached instances and guesses, and resets the counters."""
+    _lexer.cache_clear()
+    _formatter.cache_clear()
+    with _guesses_lock:
+        _guesses.clear()
+
+
+@functools.lru_cache(maxsize=128)
+def _lexer(name: str, options: Options) -> Lexer:
+    return get_lexer_by_name(name, **dict(options))
+
+
+@functools.lru_cache(maxsize=32)
+def _formatter(name: str, options: Options) -> Formatter:
+    return get_formatter_by_name(name, **dict(options))
+
+
+def _key(options: Dict[str, Any]):
+    key = tuple(sorted(options.items()))
+    try:
+        hash(key)
+    except TypeError:
+        # e.g. a list of filters; built fresh every time
+        return None
+    return key
+
+
+def _guess_lexer(sample: str, timeout: Optional[float]) -> Tuple[Lexer, bool]:
+    # The guess and whether every lexer was asked
+    name = get_filetype_from_buffer(sample)
+    if name is None:
+        for detector in _detectors:
+            name = detector(sample)
+            if name is not None:
+                break
+    if name is not None:
+        try:
+            return lexer_for(name, stripall=True), True
+        except ClassNotFound:
+            pass
+
+    # Same scoring as pygments.lexers.guess_lexer, within a time budget
+    lexer_classes = _lexer_classes()
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    best, best_score = TextLexer, 0.0
+    complete = True
+    for lexer_class in lexer_classes:
+        score = lexer_class.analyse_text(sample)
+        if score == 1.0:
+            best = lexer_class
+            break
+        if score > best_score:
+            best, best_score = lexer_class, score
+        if deadline is not None and time.perf_counter() > deadline:
+            complete = False
+            break
+    if best.aliases:
+        return lexer_for(best.aliases[0], stripall=True), complete
+    return best(stripall=True), complete
+
+
+@functools.lru_cache(maxsize=1)
+def _lexer_classes() -> Tuple[Any, ...]:
+    # Imports every lexer module once, outside of any time budget
+    return tuple(_iter_lexerclasses())
+
+
+_json = re.compile(r"\s*(?:\{\s*(?:\"|\})|\[\s*(?:[\"\[{\]\d-]|true|false|null))")
+_json_decoder = json.JSONDecoder()
+# A literal cut off at the end of the sample
+_json_truncated_value = re.compile(r"(?:n(?:u(?:ll?)?)?|t(?:r(?:ue?)?)?|f(?:a(?:l(?:se?)?)?)?|-?[\d.eE+-]*)\Z")
+_shebang = re.compile(r"#!\s*(?:\S*/)?(?:env\s+(?:-\S+\s+)*)?([A-Za-z]+)")
+_traceback = re.compile(r"\s*Traceback \(most recent call last\):")
+_diff = re.compile(r"(?:diff --git |--- \S.*\n\+\+\+ |@@ -\d)")
+# A statement's keywords along with the structure around them, so that
+#  prose starting with e.g. "Update" or "Create" is not taken for sql
+_sql_name = r"[\w.\"`\[\]]+"
+_sql_column = r"(?:\*|[\w.\"`*]+(?:\([^()]*\))?(?:\s+AS\s+\w+)?)"
+_sql = re.compile(
+    rf"""
+    \s*(?:
+        WITH\s+(?:RECURSIVE\s+)?\w+(?:\s*\([^()]*\))?\s+AS\s*\(
+        | SELECT\s+(?:DISTINCT\s+)?{_sql_column}(?:\s*,\s*{_sql_column})*\s+FROM\s+{_sql_name}
+        | INSERT\s+INTO\s+{_sql_name}[\s\S]*?\b(?:VALUES|SELECT)\b
+        | UPDATE\s+{_sql_name}\s+SET\s+{_sql_name}\s*=
+        | DELETE\s+FROM\s+{_sql_name}\s*(?:;|WHERE\b|\Z)
+        | (?:CREATE|ALTER|DROP)\s+(?:OR\s+REPLACE\s+)?(?:(?:TEMP|TEMPORARY|UNIQUE|MATERIALIZED)\s+)?
+          (?:TABLE|INDEX|VIEW|DATABASE|SCHEMA|SEQUENCE|TRIGGER|FUNCTION)\b
+    )
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+_yaml_document = re.compile(r"(?:---|%YAML)[ \t]*(?:\n|$)")
+_yaml_line = re.compile(r"\s*(?:- |[\w.\-\"']+:(?:\s|$))")
+
+
+def _detect_json(sample: str) -> Optional[str]:
+    if not _json.match(sample):
+        return None
+    text = sample.strip()
+    try:
+        _, end = _json_decoder.raw_decode(text)
+    except json.JSONDecodeError as error:
+        # The sample may end part way through the document
+        tail = text[error.pos :]
+        truncated = error.msg.startswith("Unterminated string") or _json_truncated_value.match(tail)
+        return "json" if truncated else None
+    # Nothing but more documents may follow, e.g. json lines
+    rest = text[end:].lstrip()
+    return "json" if not rest or rest[0] in "[{" else None
+
+
+def _detect_shebang(sample: str) -> Optional[str]:
+    # e.g. python3.11 is looked up as python
+    match = _shebang.match(sample)
+    return match.group(1) if match else None
+
+
+def _detect_traceback(sample: str) -> Optional[str]:
+    return "py3tb" if _traceback.match(sample) else None
+
+
+def _detect_diff(sample: str) -> Optional[str]:
+    return "diff" if _diff.match(sample) else None
+
+
+def _detect_sql(sample: str) -> Optional[str]:
+    return "sql" if _sql.match(sample) else None
+
+
+def _detect_yaml(sample: str) -> Optional[str]:
+    if _yaml_document.match(sample):
+        return "yaml"
+    # Every line must look like a mapping or sequence entry
+    lines = [line for line in sample.split("\n") if line.strip() and not line.lstrip().startswith("#")]
+    if len(lines) >= 2 and all(_yaml_line.match(line) for line in lines):
+        return "yaml"
+    return None
+
+
+_detectors: List[Callable[[str], Optional[str]]] = [
+    _detect_shebang,
+    _detect_json,
+    _detect_traceback,
+    _detect_diff,
+    _detect_sql,
+    _detect_yaml,
+]
@@ -0,0 +1,79 @@
+"""Field resolution
+
+Looks field names up directly in the calling frame's locals, then its
+globals and finally its builtins.  Nothing is copied, so resolving a
+message costs time proportional to the number of fields rather than to
+the size of the module namespace.
+
+Dotted names (e.g. ``user.id``) are supported; the attribute getter for
+each dotted name is compiled once and cached.
+
+"""
+import functools
+import operator
+from types import FrameType
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+__all__ = ("compile_name", "resolve", "resolve_fields")
+
+_missing = object()
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_name(name: str) -> Tuple[str, Optional[Callable[[Any], Any]]]:
+    """Splits *name* into its root name and an attribute getter.
+
+    Args:
+        name: a plain or dotted name
+
+    Returns:
+        the root name and a getter for the remaining path (None if plain)
+
+    """
+    root, _, path = name.partition(".")
+    return root, operator.attrgetter(path) if path else None
+
+
+def resolve(name: str, frame: FrameType) -> Any:
+    """Resolves *name* as the code running in *frame* would see it.
+
+    Args:
+        name: a plain or dotted name
+        frame: frame to resolve the name in
+
+    Returns:
+        the value or None if it could not be resolved
+
+    """
+    return resolve_fields([name], frame)[name]
+
+
+def resolve_fields(names: Iterable[str], frame: FrameType) -> Dict[str, Any]:
+    """Resolves each of *names* within *frame*.
+
+    Args:
+        names: plain or dotted names
+        frame: frame to resolve the names in
+
+    Returns:
+        names mapped to their values, None for anything unresolved
+
+    """
+    # Grab these once: f_locals may be rebuilt on every access
+    namespaces = (frame.f_locals, frame.f_globals, frame.f_builtins)
+    fields: Dict[str, Any] = {}
+    for name in names:
+        root, getter = compile_name(name)
+        for namespace in namespaces:
+            value = namespace.get(root, _missing)
+            if value is not _missing:
+                break
+        else:
+            value = None
+        if getter is not None and value is not None:
+            try:
+                value = getter(value)
+            except Exception:
+                value = None
+        fields[name] = value
+    return fields
@@ -0,0 +1,272 @@
+"""SGR (Select Graphic Rendition) state
+
+Colored text is a stream of ``ESC [ ... m`` sequences that each modify
+the current rendition.  :class:`SGRState` follows those changes, which
+allows colored text to be rewritten with fewer bytes: :func:`minimize`
+(and :func:`highlight`, which renders pygments tokens directly) only emit
+a sequence where the rendition of visible text actually changes, and then
+the shortest sequence that gets there.  Both close the rendition at every
+newline and re-open it on the next line, so each line stands on its own.
+
+"""
+import functools
+import re
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+__all__ = ("RESET", "SGRState", "highlight", "minimize")
+
+RESET = "\x1b[0m"
+
+_sgr = re.compile(r"\x1b\[([0-9;]*)m")
+
+# Codes which turn attributes off, mapped to the attributes they end
+_attributes_off = {22: (1, 2), 23: (3,), 24: (4, 21), 25: (5, 6), 27: (7,), 28: (8,), 29: (9,), 54: (51, 52), 55: (53,), 59: (58,)}
+# ... and the reverse: the code that turns each attribute off
+_attribute_off = {attribute: off for off, attributes in _attributes_off.items() for attribute in attributes}
+# Attributes that show on a blank: underlines, inverse, strike through...
+_visible_on_space = frozenset([4, 7, 9, 21, 51, 52, 53, 58])
+# Parameters taken by extended colors: 38;5;n or 38;2;r;g;b
+_extended = {"5": 3, "2": 5}
+
+
+@dataclass
+class SGRState:
+    """The rendition in effect at some point of colored text
+
+    Attributes:
+        attributes: active attributes (bold, italic...) by their
+            parameters, in the order set
+        foreground: foreground color parameters, empty for the default
+        background: background color parameters, empty for the default
+
+    """
+
+    attributes: Dict[str, None] = field(default_factory=dict)
+    foreground: str = ""
+    background: str = ""
+
+    @property
+    def active(self) -> bool:
+        return bool(self.attributes or self.foreground or self.background)
+
+    def apply(self, params: str) -> None:
+        """Updates the state with the parameters of one SGR sequence.
+
+        Args:
+            params: the parameters between ``ESC [`` and ``m``
+
+        """
+        for kind, value in _parse(params):
+            if kind == "reset":
+                self.attributes = {}
+                self.foreground = self.background = ""
+            elif kind == "on":
+                self.attributes[value] = None
+            elif kind == "off":
+                self.attributes = {attribute: None for attribute in self.attributes if _code(attribute) not in value}
+            elif kind == "foreground":
+                self.foreground = value
+            elif kind == "background":
+                self.background = value
+
+    def sequence(self) -> str:
+        """Renders the state as a single SGR sequence.
+
+        Returns:
+            sequence that recreates the state from the default rendition
+
+        """
+        if not self.active:
+            return ""
+        return f"\x1b[{';'.join(_params(self.attributes, self.foreground, self.background))}m"
+
+
+def minimize(text: str) -> str:
+    """Rewrites colored *text* with as few SGR bytes as possible.
+
+    Adjacent runs in the same rendition are merged, changes that cannot
+    be seen (e.g. the color of a space) are dropped and every change is
+    written as the shortest sequence reaching it.  The rendition is
+    closed at the end of every line.
+
+    Args:
+        text: colored text
+
+    Returns:
+        equivalent colored text
+
+    """
+    if "\x1b" not in text:
+        return text
+    pieces = _sgr.split(text)
+    runs = []
+    state = _default
+    for index in range(0, len(pieces), 2):
+        if index:
+            state = _transition(state, pieces[index - 1])
+        runs.append((state, pieces[index]))
+    return _render(runs)
+
+
+def highlight(tokens: Iterable[Tuple[Any, str]], formatter: Any) -> str:
+    """Renders pygments *tokens* in the styles of a terminal *formatter*.
+
+    The output looks the same as the formatter's, but is written like
+    :func:`minimize`'s.
+
+    Args:
+        tokens: token type and text pairs, e.g. from ``lexer.get_tokens``
+        formatter: a pygments terminal formatter (``16m``, ``256``)
+
+    Returns:
+        colored text
+
+    """
+    styles = _token_styles.get(formatter)
+    if styles is None:
+        styles = _token_styles[formatter] = {}
+    runs = []
+    for token_type, value in tokens:
+        state = styles.get(token_type)
+        if state is None:
+            state = styles[token_type] = _token_style(formatter, token_type)
+        runs.append((state, value))
+    # The formatter closes every token
+    runs.append((_default, ""))
+    return _render(runs)
+
+
+def _code(params: str) -> int:
+    return int(params.partition(";")[0])
+
+
+def _params(attributes: Iterable[str], foreground: str, background: str) -> List[str]:
+    params = list(attributes)
+    params.extend(color for color in (foreground, background) if color)
+    return params
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse(params: str) -> Tuple[Tuple[str, Any], ...]:
+    codes = params.split(";") if params else ["0"]
+    changes: List[Tuple[str, Any]] = []
+    index = 0
+    while index < len(codes):
+        code = int(codes[index] or 0)
+        size = 1
+        if code in (38, 48, 58):
+            size = _extended.get(codes[index + 1] if index + 1 < len(codes) else "", 1)
+        value = ";".join(str(int(part or 0)) for part in codes[index : index + size])
+        if code == 0:
+            changes.append(("reset", None))
+        elif code == 38 or 30 <= code <= 37 or 90 <= code <= 97:
+            changes.append(("foreground", value))
+        elif code == 39:
+            changes.append(("foreground", ""))
+        elif code == 48 or 40 <= code <= 47 or 100 <= code <= 107:
+            changes.append(("background", value))
+        elif code == 49:
+            changes.append(("background", ""))
+        elif code in _attributes_off:
+            changes.append(("off", _attributes_off[code]))
+        else:
+            # Anything else (bold, fonts, underline color...) is kept as is
+            changes.append(("on", value))
+        index += size
+    return tuple(changes)
+
+
+# SGRState as a hashable (attributes, foreground, background) with the
+#  attributes sorted, so equal renditions compare equal
+_State = Tuple[Tuple[str, ...], str, str]
+_default: _State = ((), "", "")
+_token_styles: "weakref.WeakKeyDictionary[Any, Dict[Any, _State]]" = weakref.WeakKeyDictionary()
+
+
+@functools.lru_cache(maxsize=4096)
+def _transition(state: _State, params: str) -> _State:
+    current = SGRState(dict.fromkeys(state[0]), state[1], state[2])
+    current.apply(params)
+    if not current.active:
+        # Interned so the default state can be compared by identity
+        return _default
+    return (tuple(sorted(current.attributes, key=lambda attribute: (_code(attribute), attribute))), current.foreground, current.background)
+
+
+@functools.lru_cache(maxsize=4096)
+def _shortest(old: _State, new: _State) -> str:
+    # Either reset and set everything, or change only what differs
+    reset = ["0"] + _params(*new)
+    diff = _difference(old, new)
+    params = reset if diff is None or len(";".join(reset)) < len(";".join(diff)) else diff
+    return f"\x1b[{';'.join(params)}m"
+
+
+def _difference(old: _State, new: _State) -> Optional[List[str]]:
+    offs = set()
+    for attribute in old[0]:
+        if attribute not in new[0]:
+            off = _attribute_off.get(_code(attribute))
+            if off is None:
+                # Only a reset turns this one off
+                return None
+            offs.add(off)
+    cleared = {code for off in offs for code in _attributes_off[off]}
+    kept = {attribute for attribute in old[0] if _code(attribute) not in cleared}
+    diff = [str(off) for off in sorted(offs)]
+    diff.extend(attribute for attribute in new[0] if attribute not in kept)
+    if new[1] != old[1]:
+        diff.append(new[1] or "39")
+    if new[2] != old[2]:
+        diff.append(new[2] or "49")
+    return diff
+
+
+@functools.lru_cache(maxsize=4096)
+def _same_on_space(old: _State, new: _State) -> bool:
+    if old[2] != new[2]:
+        return False
+    return {attribute for attribute in old[0] if _code(attribute) in _visible_on_space} == {
+        attribute for attribute in new[0] if _code(attribute) in _visible_on_space
+    }
+
+
+def _render(runs: Iterable[Tuple[_State, str]]) -> str:
+    out: List[str] = []
+    emitted = current = _default
+    for current, text in runs:
+        if not text:
+            continue
+        for index, line in enumerate(text.split("\n")):
+            if index:
+                # Lines stand on their own
+                if emitted is not _default:
+                    out.append(_shortest(emitted, _default))
+                    emitted = _default
+                out.append("\n")
+            if not line or current == emitted:
+                out.append(line)
+            elif line.isspace() and _same_on_space(emitted, current):
+                out.append(line)
+            else:
+                out.append(_shortest(emitted, current))
+                out.append(line)
+                emitted = current
+    if current != emitted:
+        out.append(_shortest(emitted, current))
+    return "".join(out)
+
+
+def _token_style(formatter: Any, token_type: Any) -> _State:
+    # Like the formatter: a token type without a style uses its parent's
+    while token_type:
+        on_off = formatter.style_string.get(str(token_type))
+        if on_off is not None:
+            state = _default
+            for params in _sgr.findall(on_off[0]):
+                state = _transition(state, params)
+            return state
+        token_type = token_type.parent
+    return _default
@@ -0,0 +1,187 @@
+"""Buffered output
+
+Writing each line straight through costs at least one ``write`` system
+call per line.  A :class:`BufferedSink` holds lines instead and writes
+them out together when its :class:`FlushPolicy` says so: once enough
+bytes or lines are held, once the oldest has waited long enough, or as
+soon as an error is written.
+
+In adaptive mode, lines are only held during bursts: a line arriving
+after a quiet period goes out right away, so light traffic is not
+delayed while heavy traffic is coalesced.
+
+"""
+import atexit
+import io
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import IO, List, Optional
+
+__all__ = ("BufferedSink", "FlushPolicy")
+
+# Severities are logging levels
+ERROR = 40
+
+
+@dataclass
+class FlushPolicy:
+    """When a :class:`BufferedSink` writes out what it holds
+
+    Attributes:
+        max_bytes: flush once this many characters are held
+        max_records: flush once this many writes are held
+        max_delay: seconds a write may be held before it is flushed;
+            None to hold it until another limit is reached
+        flush_severity: writes at or above this logging level are
+            flushed immediately, along with everything held before them
+        adaptive: when True, writes are only held during bursts
+        burst_interval: with *adaptive*, the average seconds between
+            writes under which traffic counts as a burst
+
+    """
+
+    max_bytes: int = 64 * 1024
+    max_records: int = 1024
+    max_delay: Optional[float] = 0.1
+    flush_severity: int = ERROR
+    adaptive: bool = False
+    burst_interval: float = 0.001
+
+
+class BufferedSink(io.TextIOBase):
+    """A text stream that writes to *file* in batches
+
+    Held writes are flushed by a background thread once *max_delay*
+    passes, and at exit.  The sink is safe to share between threads and
+    keeps the order of writes.
+
+    Example:
+        >>> sink = BufferedSink(sys.stdout, FlushPolicy(adaptive=True))
+        >>> echo("hello", file=sink)
+
+    Args:
+        file: stream to write to; sys.stdout at the time of each flush
+            when not provided
+        policy: when to flush, see :class:`FlushPolicy`
+
+    """
+
+    def __init__(self, file: Optional[IO] = None, policy: Optional[FlushPolicy] = None) -> None:
+        super().__init__()
+        self.file = file
+        self.policy = policy if policy is not None else FlushPolicy()
+        self._pending: List[str] = []
+        self._size = 0
+        self._deadline: Optional[float] = None
+        self._last_write: Optional[float] = None
+        self._interval = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flusher: Optional[threading.Thread] = None
+        _sinks.add(self)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str, severity: int = 0) -> int:  # type: ignore[override]
+        """Holds *text*, flushing if the policy says so.
+
+        Args:
+            text: text to write
+            severity: logging level of the text
+
+        Returns:
+            number of characters written
+
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        policy = self.policy
+        with self._lock:
+            now = time.monotonic()
+            self._pending.append(text)
+            self._size += len(text)
+            if (
+                severity >= policy.flush_severity
+                or self._size >= policy.max_bytes
+                or len(self._pending) >= policy.max_records
+                or (self._deadline is not None and now >= self._deadline)
+                or (policy.adaptive and self._quiet(now))
+            ):
+                self._flush()
+            elif self._deadline is None and policy.max_delay is not None:
+                self._deadline = now + policy.max_delay
+                self._schedule()
+        return len(text)
+
+    def flush(self) -> None:
+        """Writes out everything held."""
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        """Flushes and stops the sink; the wrapped stream is not closed."""
+        if self.closed:
+            return
+        with self._lock:
+            self._flush()
+            flusher, self._flusher = self._flusher, None
+            self._wakeup.notify()
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join()
+        super().close()
+
+    def _quiet(self, now: float) -> bool:
+        # Moving average of the time between writes
+        last, self._last_write = self._last_write, now
+        if last is None:
+            return True
+        self._interval += (now - last - self._interval) / 8
+        return self._interval >= self.policy.burst_interval
+
+    def _flush(self) -> None:
+        self._deadline = None
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        self._size = 0
+        file = self.file if self.file is not None else sys.stdout
+        file.write(text)
+        file.flush()
+
+    def _schedule(self) -> None:
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._run, name="termlog-flusher", daemon=True)
+            self._flusher.start()
+        else:
+            self._wakeup.notify()
+
+    def _run(self) -> None:
+        # Flushes held writes once they are due; exits when nothing is held
+        with self._lock:
+            while self._flusher is threading.current_thread() and self._deadline is not None:
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                else:
+                    self._flush()
+            if self._flusher is threading.current_thread():
+                self._flusher = None
+
+
+_sinks: "weakref.WeakSet[BufferedSink]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_sinks() -> None:
+    for sink in list(_sinks):
+        if not sink.closed:
+            try:
+                sink.flush()
+            except (OSError, ValueError):
+                # e.g. the wrapped stream is already closed
+                pass
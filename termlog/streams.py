@@ -0,0 +1,141 @@
+"""Escape stripping streams
+
+Wraps a file or pipe so that terminal escape sequences written to it are
+removed, e.g. to tee one colored stream to a terminal and a clean file:
+
+    >>> import termlog
+    >>> from termlog.streams import StripEscapeWriter
+    >>> with open("out.log", "w") as log, StripEscapeWriter(log) as clean:
+    ...     string = termlog.echo(termlog.red("hi"), color=True)
+    ...     clean.write(f"{string}\\n")
+
+Writes are collected into large buffers before they are stripped.  An
+escape sequence split across two writes is held back until it is
+complete, so only that tail (at most :data:`MAX_SEQUENCE_LENGTH`) is ever
+kept between buffers.  Closing a writer flushes, but does not close, the
+wrapped stream.
+
+"""
+import io
+import re
+from typing import IO, Any, AnyStr, Generic, List
+
+from .message import _escape_sequence
+
+__all__ = ("StripEscapeBytesWriter", "StripEscapeWriter")
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+# Incomplete sequences longer than this are written out unstripped
+MAX_SEQUENCE_LENGTH = 4096
+
+# A prefix of an escape sequence at the very end of the buffer
+_partial_sequence = re.compile(
+    r"""
+    \x1b
+    (?:
+        \[ [0-?]* [ -/]*
+        | [\]PX^_] [^\x07\x1b]* \x1b?
+        | [ -/]*
+    )
+    \Z
+    """,
+    re.VERBOSE,
+)
+_escape_sequence_bytes = re.compile(_escape_sequence.pattern.encode(), re.VERBOSE)
+_partial_sequence_bytes = re.compile(_partial_sequence.pattern.encode(), re.VERBOSE)
+
+
+class _StripEscape(Generic[AnyStr]):
+    """Buffering and stripping shared by the text and bytes writers"""
+
+    _empty: Any
+    _escape: Any
+    _sequence: Any
+    _partial: Any
+
+    def __init__(self, stream: IO[AnyStr], buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        super().__init__()
+        self.stream: IO[AnyStr] = stream
+        self.buffer_size = buffer_size
+        self._chunks: List[AnyStr] = []
+        self._size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: AnyStr) -> int:
+        if self.closed:  # type: ignore
+            raise ValueError("write to closed file")
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size >= self.buffer_size:
+            self._drain()
+        return len(data)
+
+    def flush(self) -> None:
+        if not self.closed:  # type: ignore
+            self._drain()
+            self.stream.flush()
+
+    def close(self) -> None:
+        if not self.closed:  # type: ignore
+            try:
+                self._drain(final=True)
+                self.stream.flush()
+            finally:
+                super().close()  # type: ignore
+
+    def _drain(self, final: bool = False) -> None:
+        data = self._empty.join(self._chunks)
+        tail = self._empty
+        if not final:
+            match = self._partial.search(data, max(len(data) - MAX_SEQUENCE_LENGTH, 0))
+            if match:
+                data, tail = data[: match.start()], data[match.start() :]
+        self._chunks = [tail] if tail else []
+        self._size = len(tail)
+        if data:
+            self.stream.write(self._strip(data))
+
+    def _strip(self, data: AnyStr) -> AnyStr:
+        if self._escape not in data:
+            return data
+        return self._sequence.sub(self._empty, data)
+
+
+class StripEscapeWriter(_StripEscape[str], io.TextIOBase):
+    """Writes text to *stream* with terminal escape sequences removed
+
+    Args:
+        stream: text stream to write to
+        buffer_size: characters collected before they are stripped and
+            written
+
+    """
+
+    _empty = ""
+    _escape = "\x1b"
+    _sequence = _escape_sequence
+    _partial = _partial_sequence
+
+
+class StripEscapeBytesWriter(_StripEscape[bytes], io.BufferedIOBase):
+    """Writes bytes to *stream* with terminal escape sequences removed
+
+    The escape character never occurs within a multi-byte UTF-8
+    character, so encoded text can be stripped without being decoded.
+
+    Args:
+        stream: binary stream to write to
+        buffer_size: bytes collected before they are stripped and written
+
+    """
+
+    _empty = b""
+    _escape = b"\x1b"
+    _sequence = _escape_sequence_bytes
+    _partial = _partial_sequence_bytes
+
+    def write(self, data: bytes) -> int:  # type: ignore
+        # Callers may reuse a bytearray or memoryview after writing it
+        return super().write(bytes(data))
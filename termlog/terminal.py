@@ -1,10 +1,12 @@
 import sys
-from typing import IO, Any, Optional, Union
-
-from pygments.lexer import Lexer
+from typing import IO, TYPE_CHECKING, Any, Mapping, Optional, Union
 
 from .config import _terminal_config, set_config
-from .formatting import format
+from .formatting import _prepare, format
+from .sinks import BufferedSink
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pygments.lexer import Lexer
 
 __all__ = ("echo", "set_config")
 
@@ -13,13 +15,15 @@ def echo(
     *messages: Any,
     verbose: Optional[Union[bool, int]] = None,
     end: str = "\n",
-    flush: bool = True,
-    lexer: Optional[Union[Lexer, str]] = None,
-    file: IO = sys.stdout,
+    flush: Optional[bool] = None,
+    lexer: Optional[Union["Lexer", str]] = None,
+    file: Union[IO, BufferedSink] = sys.stdout,
     color: Optional[bool] = None,
     json: Optional[bool] = None,
     time_format: Optional[str] = None,
     add_timestamp: Optional[bool] = None,
+    fields: Optional[Mapping[str, Any]] = None,
+    severity: int = 0,
 ) -> Optional[str]:
     """Echo *message*.
 
@@ -30,16 +34,23 @@ def echo(
         messages: messages to echo
         verbose: verbosity level
         end: text to print at end of message, defaults to newline
-        flush: flush output after write
+        flush: flush output after write; by default, always for files
+            and as the sink's policy decides for a buffered sink
         lexer: message lexical analyzer
-        file: file to echo message to
+        file: file to echo message to, or a
+            :class:`~termlog.sinks.BufferedSink`
         json: Dump out a structured text
         time_format: string to control time formatting
         add_timestamp: Controls whether the timestamp is dumped out
         color: control color output
+        fields: structured fields for json output; when provided, the
+            fields are not inferred from the calling code
+        severity: logging level of the message; buffered sinks flush
+            errors immediately
 
     Returns:
-        Tuple[str]: beautified messages
+        Tuple[str]: beautified messages; None when written in the
+        background, see :mod:`termlog.dispatch`
 
     """
     # verbose should be minimally capped to 0
@@ -52,6 +63,27 @@ def echo(
     json = json if json is not None else _terminal_config.json
     color = color if color is not None else _terminal_config.color
 
-    string = format(*messages, lexer=lexer, color=color, json=json, time_format=time_format, add_timestamp=add_timestamp)
-    print(string, file=file, end=end, flush=flush)
+    if _terminal_config.background:
+        from .dispatch import Record, submit
+
+        prepared = _prepare(
+            *messages, lexer=lexer, color=color, json=json, time_format=time_format, add_timestamp=add_timestamp, fields=fields
+        )
+        # The calling frame moves on once echo returns
+        for message in prepared:
+            message._update_fields()
+        submit(Record(prepared, file=file, end=end, flush=flush, severity=severity))
+        return None
+
+    string = format(*messages, lexer=lexer, color=color, json=json, time_format=time_format, add_timestamp=add_timestamp, fields=fields)
+    if isinstance(file, BufferedSink):
+        file.write(f"{string}{end}", severity=severity)
+        if flush:
+            file.flush()
+    else:
+        # One write, so that other writers to the stream cannot land
+        #  between the message and its end
+        file.write(f"{string}{end}")
+        if flush is None or flush:
+            file.flush()
     return string
@@ -0,0 +1,137 @@
+import asyncio
+import io
+import os
+import threading
+import time
+
+import pytest
+
+
+class SlowStream(io.StringIO):
+    def __init__(self, delay=0.01):
+        super().__init__()
+        self.delay = delay
+        self.writes = 0
+        self.threads = set()
+
+    def write(self, text):
+        time.sleep(self.delay)
+        self.writes += 1
+        self.threads.add(threading.current_thread().name)
+        return super().write(text)
+
+
+def test_aecho_does_not_write_on_the_loop():
+    from ..aio import aecho, drain
+
+    stream = SlowStream()
+
+    async def main():
+        start = time.perf_counter()
+        results = [await aecho("line", index, file=stream, color=False, add_timestamp=False) for index in range(20)]
+        # 20 slow writes would take at least 0.2s on the loop
+        assert time.perf_counter() - start < 0.1
+        await drain()
+        return results
+
+    results = asyncio.run(main())
+    assert results == [f"line {index}" for index in range(20)]
+    assert stream.getvalue() == "".join(f"line {index}\n" for index in range(20))
+    # the writes were coalesced, off the loop's thread
+    assert stream.writes < 20
+    assert threading.current_thread().name not in stream.threads
+
+
+def test_backpressure():
+    from ..aio import AsyncSink
+
+    stream = SlowStream(delay=0.001)
+
+    async def main():
+        sink = AsyncSink(stream, high_water=100)
+        for index in range(200):
+            await sink.write(f"{index:09}\n")
+            # the writer waits whenever it gets too far ahead
+            assert sink._size <= 100 + 10
+        await sink.aclose()
+        with pytest.raises(ValueError):
+            await sink.write("closed\n")
+
+    asyncio.run(main())
+    assert stream.getvalue() == "".join(f"{index:09}\n" for index in range(200))
+
+
+@pytest.mark.skipif(not hasattr(os, "pipe") or os.name == "nt", reason="needs unix pipes")
+def test_transport():
+    from ..aio import AsyncSink, aecho
+
+    read_fd, write_fd = os.pipe()
+    received = []
+    reader = threading.Thread(target=lambda: received.extend(iter(lambda: os.read(read_fd, 1 << 16), b"")))
+    reader.start()
+
+    async def main():
+        with open(write_fd, "w") as pipe:
+            sink = AsyncSink(pipe, transport=True)
+            for index in range(1000):
+                await aecho(index, file=sink, color=False, add_timestamp=False)
+            assert sink._writer is not None
+            await sink.aclose()
+
+    asyncio.run(main())
+    reader.join(5)
+    os.close(read_fd)
+    assert b"".join(received).decode().split() == [str(index) for index in range(1000)]
+
+
+def test_aecho_fields():
+    import json
+
+    from ..aio import aecho, drain
+
+    stream = io.StringIO()
+
+    async def main():
+        user = "bob"
+        await aecho("hi", user, file=stream, json=True, add_timestamp=False)
+        await drain()
+
+    asyncio.run(main())
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+        {"data": "hi", "user": "bob"},
+        {"data": "bob", "user": "bob"},
+    ]
+
+
+def test_aecho_without_drain(tmp_path):
+    import subprocess
+    import sys
+
+    path = tmp_path / "out.log"
+    code = (
+        "import asyncio, termlog\n"
+        "async def main(file):\n"
+        "    for index in range(200):\n"
+        "        await termlog.aecho(index, file=file, color=False, add_timestamp=False)\n"
+        f"asyncio.run(main(open({str(path)!r}, 'w')))\n"
+    )
+    # the loop is gone before the last batches are written
+    subprocess.run([sys.executable, "-c", code], check=True)
+    assert path.read_text().split() == [str(index) for index in range(200)]
+
+
+def test_aecho_is_written_before_the_loop_closes():
+    import subprocess
+    import sys
+
+    code = (
+        "import asyncio, termlog\n"
+        "async def main():\n"
+        "    for index in range(200):\n"
+        "        await termlog.aecho(index, color=False, add_timestamp=False)\n"
+        "asyncio.run(main())\n"
+        "termlog.echo('after', color=False, add_timestamp=False)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.split("\n") == [str(index) for index in range(200)] + ["after", ""]
+    assert result.stderr == ""
@@ -17,13 +17,13 @@ class BeautifyData:
     "test_data",
     [
         BeautifyData("a", expected="a"),  # expected='\x1b[38;5;247ma\x1b[39m'),
-        BeautifyData("ls -lashtr $HOME", lexer="bash", expected="ls -lashtr \x1b[38;2;25;23;124m$HOME\x1b[39m"),
+        BeautifyData("ls -lashtr $HOME", lexer="bash", expected="ls -lashtr \x1b[38;2;25;23;124m$HOME\x1b[0m"),
         # `pygments.guess_lexer` no longer guesses sql for some reason.  2019-12-06
         # BeautifyData('SELECT * FROM some_table;', expected='\x1b[38;2;0;128;0;01mSELECT\x1b[39;00m \x1b[38;2;102;102;102m*\x1b[39m \x1b[38;2;0;128;0;01mFROM\x1b[39;00m some_table;'),
         BeautifyData(
             "SELECT * FROM some_table;",
             lexer="postgres",
-            expected="\x1b[38;2;0;128;0;01mSELECT\x1b[39;00m \x1b[38;2;102;102;102m*\x1b[39m \x1b[38;2;0;128;0;01mFROM\x1b[39;00m some_table;",
+            expected="\x1b[1;38;2;0;128;0mSELECT \x1b[0;38;2;102;102;102m* \x1b[1;38;2;0;128;0mFROM \x1b[0msome_table;",
         ),
         BeautifyData(Path("."), expected="."),
     ],
@@ -35,3 +35,36 @@ def test_beautify(test_data):
     expected = input_params.pop("expected")
     result = beautify(**input_params)
     assert result == expected, f"{result} did not match {expected}, {(result,)}"
+
+
+def test_beautify_block():
+    from ..formatting import beautify
+    from ..message import strip_escape
+
+    code = '\nx = """first\n  second"""\ny = 1\n'
+    per_line = beautify(code, lexer="python", indent=2)
+    block = beautify(code, lexer="python", indent=2, block=True)
+    assert strip_escape(block) == strip_escape(per_line)
+    lines = block.split("\n")
+    assert lines[0] == lines[-1] == ""
+    assert all(line.startswith("  ") for line in lines[1:-1])
+    # the string's second line re-opens the string's color
+    assert lines[2].startswith("  \x1b[38;2;")
+
+
+def test_beautify_is_memoized(monkeypatch):
+    from .. import formatting
+    from ..lexers import lexer_for
+
+    formatting.highlight_cache.clear()
+    calls = []
+    original = formatting._beautify
+    monkeypatch.setattr(formatting, "_beautify", lambda *args: calls.append(args) or original(*args))
+    payload = 'SELECT * FROM some_table WHERE name = "termlog";'
+    first = formatting.beautify(payload, lexer="sql")
+    assert formatting.beautify(payload, lexer="sql") == first
+    assert formatting.beautify(payload, lexer="sql", indent=2) != first
+    assert formatting.beautify(payload, lexer=lexer_for("sql")) == first
+    assert len(calls) == 3
+    stats = formatting.highlight_cache.stats()
+    assert (stats.hits, stats.misses) == (1, 3)
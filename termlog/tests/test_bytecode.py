@@ -0,0 +1,69 @@
+import sys
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Optional, Tuple
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 11), reason="requires co_positions")
+
+
+def fields(*args, **kwds) -> Optional[Tuple[str, ...]]:
+    from ..bytecode import extract_fields
+
+    frame = sys._getframe(1)
+    return extract_fields(frame.f_code, frame.f_lasti)
+
+
+async def awaited_fields(*args, **kwds) -> Optional[Tuple[str, ...]]:
+    from ..bytecode import extract_fields
+
+    # the awaiting coroutine is suspended past the call
+    frame = sys._getframe(1)
+    return extract_fields(frame.f_code, frame.f_lasti)
+
+
+@dataclass
+class BytecodeData:
+    code: str
+    expected: Tuple[str, ...] = ()
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        BytecodeData("fields()"),
+        BytecodeData("fields(message)", expected=("message",)),
+        BytecodeData('fields(f"A {red(message)} message!")', expected=("message",)),
+        BytecodeData("fields(user.id, items[index])", expected=("user.id", "items", "index")),
+        BytecodeData("fields(user.address.city, user.id.bit_length())", expected=("user.address.city",)),
+        BytecodeData("fields(message.upper(), json=flag)"),
+        BytecodeData("fields(message,\n    color=flag,\n)", expected=("message",)),
+    ],
+)
+def test_extract_fields(test_data):
+    user = SimpleNamespace(id=1, address=SimpleNamespace(city="Austin"))
+    namespace = dict(fields=fields, red=str, message="hi", user=user, items=[2], index=0, flag=True)
+    code = compile(f"result = {test_data.code}", "<sourceless>", "exec")
+    exec(code, namespace)
+    assert namespace["result"] == test_data.expected
+
+
+def test_extract_awaited_fields():
+    import asyncio
+
+    namespace = dict(awaited_fields=awaited_fields, message="hi", flag=True)
+    code = compile("async def run():\n    return await awaited_fields(message, json=flag)", "<sourceless>", "exec")
+    exec(code, namespace)
+    assert asyncio.run(namespace["run"]()) == ("message",)
+
+
+def test_sourceless_format():
+    import json
+
+    from .. import format
+
+    namespace = dict(format=format, message="green")
+    code = compile('result = format(f"A {message} message!", json=True, color=False, add_timestamp=False)', "<sourceless>", "exec")
+    exec(code, namespace)
+    assert json.loads(namespace["result"]) == {"data": "A green message!", "message": "green"}
@@ -0,0 +1,48 @@
+import sys
+
+
+def test_byte_lru_evicts_by_size():
+    from ..cache import ByteLRU
+
+    value = "x" * 1000
+    size = sys.getsizeof(value)
+    cache = ByteLRU(max_size=size * 2)
+    cache.put("a", value)
+    cache.put("b", value)
+    assert cache.get("a") == value  # b is now least recently used
+    cache.put("c", value)
+    assert cache.get("b") is None
+    assert cache.get("c") == value
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries, stats.size) == (2, 1, 1, 2, size * 2)
+
+
+def test_byte_lru_skips_oversized_values():
+    from ..cache import ByteLRU
+
+    cache = ByteLRU(max_size=100)
+    cache.put("a", "x" * 1000)
+    assert cache.get("a") is None
+    assert cache.stats().entries == 0
+
+
+def test_byte_lru_replaces_and_clears():
+    from ..cache import ByteLRU
+
+    cache = ByteLRU(max_size=10_000)
+    cache.put("a", "short")
+    cache.put("a", "longer value")
+    assert cache.get("a") == "longer value"
+    assert cache.stats().size == sys.getsizeof("longer value")
+    cache.clear()
+    assert cache.stats() == type(cache.stats())(max_size=10_000)
+
+
+def test_byte_lru_explicit_size():
+    from ..cache import ByteLRU
+
+    cache = ByteLRU(max_size=1000)
+    cache.put("a", "short", size=600)
+    cache.put("b", "short", size=600)
+    assert cache.get("a") is None
+    assert cache.stats().size == 600
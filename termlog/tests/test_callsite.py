@@ -0,0 +1,100 @@
+import sys
+
+import pytest
+
+
+def test_field_names_are_cached(monkeypatch):
+    from .. import callsite
+
+    calls = []
+    extract_fields = callsite.extract_fields
+
+    def counting_extract_fields(code):
+        calls.append(code)
+        return extract_fields(code)
+
+    monkeypatch.setattr(callsite, "extract_fields", counting_extract_fields)
+    callsite.clear_cache()
+
+    def names_at_call_site(*args):
+        return callsite.field_names(sys._getframe(1))
+
+    message = "hi"
+    names = []
+    for _ in range(3):
+        names.append(names_at_call_site(f"{message}"))
+    assert names[0] == names[1] == names[2]
+    assert "message" in names[0]
+    assert len(calls) == 1
+
+
+def test_clear_cache():
+    from .. import callsite
+
+    frame = sys._getframe()
+    callsite.field_names(frame)
+    callsite.clear_cache()
+    assert frame.f_code not in callsite._call_sites
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="requires co_positions")
+def test_call_source_is_the_call_expression():
+    from .. import callsite
+
+    def source_at_call_site(*args, **kwds):
+        return callsite.call_source(sys._getframe(1))
+
+    unrelated = "ignored"
+    message = "hi"
+    source = source_at_call_site(f"{message}", json=True)
+    assert unrelated
+    assert source == 'source_at_call_site(f"{message}", json=True)'
+
+
+def test_single_capture_per_format(monkeypatch):
+    import json
+
+    from .. import callsite, format
+
+    calls = []
+    field_names = callsite.field_names
+
+    def counting_field_names(frame, lasti=None):
+        calls.append(frame)
+        return field_names(frame, lasti)
+
+    monkeypatch.setattr(callsite, "field_names", counting_field_names)
+    message = "hi"
+    output = format(f"{message}", message, "!", json=True, color=False, add_timestamp=False)
+    assert [json.loads(line)["message"] for line in output.split("\n")] == ["hi", "hi", "hi"]
+    assert len(calls) == 1
+
+
+def test_dotted_fields():
+    import json
+    from types import SimpleNamespace
+
+    from .. import format
+
+    user = SimpleNamespace(id=7, address=SimpleNamespace(city="Austin"))
+    output = format(f"{user.id} {user.address.city}", json=True, color=False, add_timestamp=False)
+    assert json.loads(output) == {"data": "7 Austin", "user.id": 7, "user.address.city": "Austin"}
+
+
+@pytest.mark.parametrize("edited", ["x = 1\n", "\n\n\n\n" + "\xe9" * 40 + "\n"])
+def test_source_changed_on_disk(tmp_path, edited):
+    import json
+    import linecache
+
+    from .. import format
+
+    path = tmp_path / "module.py"
+    source = '\n\n\n\nresult = format(f"{message}", json=True, color=False, add_timestamp=False)\n'
+    path.write_text(source, encoding="utf-8")
+    code = compile(source, str(path), "exec")
+    # e.g. a reloader picked up an edit made after the import
+    path.write_text(edited, encoding="utf-8")
+    linecache.checkcache(str(path))
+    namespace = dict(format=format, message="hi")
+    exec(code, namespace)
+    assert json.loads(namespace["result"]) == {"data": "hi", "message": "hi"}
@@ -0,0 +1,140 @@
+import io
+import threading
+from dataclasses import asdict, dataclass
+
+import pytest
+
+
+class SlowStream(io.StringIO):
+    """Blocks writes until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+
+    def write(self, text):
+        self.released.wait(5)
+        return super().write(text)
+
+
+@pytest.fixture
+def background():
+    from .. import config, dispatch
+
+    saved = asdict(config._terminal_config)
+    config.set_config(background=True, color=False, timestamp=False)
+    yield config
+    dispatch.drain(5)
+    # set_config cannot put timestamp back to None
+    for key, value in saved.items():
+        setattr(config._terminal_config, key, value)
+
+
+def test_echo_in_background(background):
+    from .. import echo
+    from ..dispatch import drain
+
+    stream = io.StringIO()
+    threads = [
+        threading.Thread(target=lambda name=name: [echo(name, index, file=stream) for index in range(100)]) for name in ("a", "b", "c")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert drain(5)
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 300
+    for name in ("a", "b", "c"):
+        # each producer's lines keep their order
+        assert [line for line in lines if line.startswith(name)] == [f"{name} {index}" for index in range(100)]
+
+
+def test_json_fields_are_read_at_the_call(background):
+    import json
+
+    from .. import echo
+    from ..dispatch import drain
+
+    background.set_config(json=True)
+    stream = io.StringIO()
+    value = 1
+    assert echo("first", value, file=stream) is None
+    value = 2
+    echo("second", value, file=stream)
+    assert drain(5)
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [record["value"] for record in records if record["data"] in ("first", "second")] == [1, 2]
+
+
+@dataclass
+class PolicyData:
+    policy: str
+    expected: tuple
+    dropped: int
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        PolicyData("drop-newest", expected=(0, 1, 2, 3), dropped=16),
+        PolicyData("drop-oldest", expected=(0, 17, 18, 19), dropped=16),
+        PolicyData("sample", expected=(0, 2, 3, 13), dropped=16),
+    ],
+)
+def test_full_queue_policy(background, test_data):
+    from .. import echo
+    from ..dispatch import drain, stats
+
+    background.set_config(queue_size=3, queue_policy=test_data.policy)
+    stream = SlowStream()
+    before = stats()
+    echo(0, file=stream)
+    # the writer holds the first record while the rest fill up the queue
+    while stats().pending:
+        pass
+    for index in range(1, 20):
+        echo(index, file=stream)
+    stream.released.set()
+    assert drain(5)
+    assert tuple(int(line) for line in stream.getvalue().splitlines()) == test_data.expected
+    assert stats().dropped - before.dropped == test_data.dropped
+
+
+def test_errors_are_never_dropped(background):
+    from .. import echo
+    from ..dispatch import drain
+
+    background.set_config(queue_size=1, queue_policy="drop-newest")
+    stream = SlowStream()
+    echo(0, file=stream)
+    echo(1, file=stream)
+    threading.Timer(0.05, stream.released.set).start()
+    echo(2, file=stream)
+    echo(3, file=stream, severity=40)
+    assert drain(5)
+    assert stream.getvalue().splitlines()[-1] == "3"
+
+
+@pytest.mark.parametrize("policy", ["drop-oldest", "sample"])
+def test_queued_errors_are_not_evicted(background, policy):
+    from .. import echo
+    from ..dispatch import drain, stats
+
+    background.set_config(queue_size=2, queue_policy=policy)
+    stream = SlowStream()
+    echo(0, file=stream)
+    while stats().pending:
+        pass
+    echo(1, file=stream, severity=40)
+    for index in range(2, 13):
+        echo(index, file=stream)
+    stream.released.set()
+    assert drain(5)
+    assert [int(line) for line in stream.getvalue().splitlines()] == [0, 1, 12]
+
+
+def test_unknown_policy(background):
+    with pytest.raises(ValueError):
+        background.set_config(queue_policy="drop_oldest")
+    assert background._terminal_config.queue_policy == "block"
@@ -0,0 +1,85 @@
+import datetime
+import enum
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+
+class Color(enum.Enum):
+    red = 1
+
+
+@dataclass
+class Point:
+    x: int
+    y: Any = None
+
+
+@dataclass
+class EncodingData:
+    value: Any
+    expected: Any
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        EncodingData(datetime.datetime(2019, 2, 22, 22, 57, 4), "2019-02-22 22:57:04"),
+        EncodingData(datetime.date(2019, 2, 22), "2019-02-22"),
+        EncodingData(datetime.timedelta(seconds=90), "0:01:30"),
+        EncodingData(Path("/tmp/log"), "/tmp/log"),
+        EncodingData(Color.red, "Color.red"),
+        EncodingData(b"abc", "b'abc'"),
+        EncodingData({1}, "{1}"),
+        EncodingData(ValueError("bad"), "bad"),
+        EncodingData(Point(1, Point(2)), {"x": 1, "y": {"x": 2, "y": None}}),
+        EncodingData(object, "<class 'object'>"),
+    ],
+)
+def test_default_matches_legacy_output(test_data):
+    from ..encoding import default, dumps
+
+    assert json.loads(dumps({"value": test_data.value})) == {"value": test_data.expected}
+    assert dumps(test_data.value) == json.dumps(test_data.value, default=default)
+
+
+def test_register():
+    from ..encoding import _encoders, dumps, encoder_for, register
+
+    assert dumps({"ids": {3, 1, 2}}) != '{"ids": [1, 2, 3]}'
+    register(set, sorted)
+    try:
+        assert encoder_for(set) is sorted
+        assert dumps({"ids": {3, 1, 2}}) == '{"ids": [1, 2, 3]}'
+    finally:
+        register(set, str)
+    assert _encoders[set] is str
+    assert encoder_for(set) is str
+
+
+def test_orjson_backend():
+    pytest.importorskip("orjson")
+    from ..config import _terminal_config, set_config
+    from ..encoding import dumps
+
+    data = {"when": datetime.date(2019, 2, 22), "point": Point(1), 3: "three", "big": 2**70}
+    set_config(json_backend="orjson")
+    try:
+        rendered = dumps(data)
+    finally:
+        _terminal_config.json_backend = "json"
+    assert json.loads(rendered) == {"when": "2019-02-22", "point": {"x": 1, "y": None}, "3": "three", "big": 2**70}
+
+
+def test_unknown_backend_falls_back():
+    from ..config import _terminal_config, set_config
+    from ..encoding import dumps
+
+    set_config(json_backend="missing")
+    try:
+        assert dumps({"a": 1}) == '{"a": 1}'
+    finally:
+        _terminal_config.json_backend = "json"
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+
+def test_calling_frame_is_external():
+    from ..frames import calling_frame
+
+    assert calling_frame() is sys._getframe()
+
+
+def test_is_internal():
+    from ..formatting import format
+    from ..frames import is_internal
+    from ..message import Message
+
+    assert is_internal(format.__code__)
+    assert is_internal(Message.__init__.__code__)
+    assert not is_internal(sys._getframe().f_code)
+    # a sibling package sharing the prefix is not termlog
+    sibling = Path(format.__code__.co_filename).parent.with_name("termlog_plugins") / "plugin.py"
+    assert not is_internal(compile("", str(sibling), "exec"))
+
+
+def test_calling_frame_from_message():
+    from ..message import Message
+
+    frame = sys._getframe()
+    assert Message("hi", json=True).calling_frame is frame
+
+
+def test_calling_frame_code_and_data():
+    from ..message import Message
+
+    user = "bob"
+    message = Message(f"hi {user}", json=True)
+    assert 'Message(f"hi {user}", json=True)' in message.calling_frame_code
+    assert message.calling_frame_data == {"user": "bob"}
@@ -0,0 +1,92 @@
+import json
+from dataclasses import dataclass
+
+import pytest
+
+SQL = "SELECT *\n  FROM logs /* spans\n  two lines */\n WHERE level = 'error';\n"
+YAML = "name: termlog\ndescription: |\n  colored\n  logging\ntags:\n  - json\n"
+TRACEBACK = 'Traceback (most recent call last):\n  File "x.py", line 1, in <module>\n    1/0\nZeroDivisionError: division by zero\n'
+DOCUMENT = json.dumps({"a": [1, 2.5, {"b": "c", "d": None}], "e": True}, indent=2) + "\n"
+
+
+@dataclass
+class StreamData:
+    text: str
+    lexer: str
+    chunk_size: int
+    indent: int = 0
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        StreamData(SQL, "sql", 1),
+        StreamData(SQL, "sql", 7),
+        StreamData(YAML, "yaml", 3),
+        StreamData(TRACEBACK, "py3tb", 5),
+        StreamData(DOCUMENT, "json", 4),
+        StreamData(DOCUMENT, "json", 4096, indent=2),
+    ],
+)
+def test_matches_block_highlighting(test_data):
+    from ..formatting import beautify
+    from ..highlighter import StreamingHighlighter
+
+    highlighter = StreamingHighlighter(lexer=test_data.lexer, indent=test_data.indent)
+    text = test_data.text
+    lines = []
+    for index in range(0, len(text), test_data.chunk_size):
+        lines.extend(highlighter.feed(text[index : index + test_data.chunk_size]))
+    lines.extend(highlighter.close())
+    expected = beautify(text, indent=test_data.indent, lexer=test_data.lexer, block=True)
+    assert "\n".join(lines) + "\n" == expected
+
+
+def test_lines_are_yielded_when_complete():
+    from ..highlighter import StreamingHighlighter
+    from ..message import strip_escape
+
+    highlighter = StreamingHighlighter(lexer="python")
+    assert highlighter.feed('x = """one') == []
+    lines = highlighter.feed("\ntwo")
+    assert [strip_escape(line) for line in lines] == ['x = """one']
+    lines = highlighter.feed('"""\ny = 1')
+    # the second line is still colored as the string it continues
+    assert [strip_escape(line) for line in lines] == ['two"""']
+    assert lines[0].startswith("\x1b[")
+    assert [strip_escape(line) for line in highlighter.close()] == ["y = 1"]
+
+
+def test_bytes_split_inside_a_character():
+    from ..highlighter import StreamingHighlighter
+    from ..message import strip_escape
+
+    data = '["café", "naïve"]\r\n'.encode("utf-8")
+    highlighter = StreamingHighlighter(lexer="json")
+    lines = []
+    for index in range(len(data)):
+        lines.extend(highlighter.feed(data[index : index + 1]))
+    lines.extend(highlighter.close())
+    assert [strip_escape(line) for line in lines] == ['["café", "naïve"]']
+
+
+def test_guesses_the_lexer():
+    from ..highlighter import StreamingHighlighter
+
+    highlighter = StreamingHighlighter()
+    assert highlighter.feed(DOCUMENT) == []
+    lines = highlighter.close()
+    assert highlighter.lexer.name == "JSON"
+    assert len(lines) == DOCUMENT.count("\n")
+
+
+def test_memory_is_bounded_by_the_longest_line():
+    from ..highlighter import StreamingHighlighter
+
+    highlighter = StreamingHighlighter(lexer="json")
+    line = json.dumps({"key": "value" * 10}) + "\n"
+    for _ in range(10000):
+        highlighter.feed(line[:20])
+        highlighter.feed(line[20:])
+        assert sum(len(piece) for piece in highlighter._partial) <= len(line)
+    assert highlighter._unguessed == []
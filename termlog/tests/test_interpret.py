@@ -0,0 +1,48 @@
+from dataclasses import dataclass, field
+from typing import List
+
+import pytest
+
+
+@dataclass
+class ExtractData:
+    code: str
+    expected: List[str] = field(default_factory=list)
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        ExtractData("echo()"),
+        ExtractData('echo(f"{a} {b!r:>{width}}")', expected=["a", "b", "width"]),
+        ExtractData("echo(a, json=b)", expected=["a"]),
+        ExtractData("echo(user.address.city)", expected=["user.address.city"]),
+        ExtractData("echo([user.id for user in users])", expected=["users"]),
+        ExtractData("echo(items[index])", expected=["items", "index"]),
+        ExtractData("echo({key: value})", expected=["key", "value"]),
+        ExtractData("echo([x for x in items if x > limit])", expected=["items", "limit"]),
+        ExtractData("echo({k: v for k, v in mapping})", expected=["mapping"]),
+        ExtractData("echo(mapping.items())"),
+        ExtractData("echo(lambda x: x + y)"),
+        ExtractData("echo(a if b else c)", expected=["b", "a", "c"]),
+        ExtractData("x = echo(a)", expected=["a"]),
+        ExtractData("for i in items:\n    echo(i)", expected=["items", "i"]),
+        ExtractData("try:\n    echo(a)\nexcept ValueError as e:\n    echo(e)\nfinally:\n    echo(b)", expected=["a", "e", "b"]),
+        ExtractData("with open(path) as f:\n    echo(f)", expected=["path", "f"]),
+        ExtractData("import os\nassert a\nraise b\ndel c"),
+        ExtractData("def f():\n    echo(a)", expected=["a"]),
+    ],
+)
+def test_extract_fields(test_data):
+    from ..interpret import extract_fields
+
+    assert list(extract_fields(test_data.code)) == test_data.expected
+
+
+def test_extract_fields_large_block(capfd):
+    from ..interpret import extract_fields
+
+    code = "\n".join(f"echo(name_{index})" for index in range(5000))
+    fields = extract_fields(code)
+    assert len(fields) == 5000
+    assert capfd.readouterr().out == ""
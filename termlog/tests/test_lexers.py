@@ -0,0 +1,136 @@
+import threading
+from dataclasses import dataclass
+
+import pytest
+
+
+def test_lexer_for():
+    from ..lexers import cache_info, clear_cache, lexer_for
+
+    clear_cache()
+    lexer = lexer_for("json")
+    assert lexer is lexer_for("json")
+    assert lexer is not lexer_for("json", stripall=True)
+    assert lexer_for("json", stripall=True) is lexer_for("json", stripall=True)
+    info = cache_info()["lexers"]
+    assert (info.hits, info.misses) == (3, 2)
+
+
+def test_formatter_for():
+    from ..lexers import cache_info, clear_cache, formatter_for
+
+    clear_cache()
+    assert formatter_for("16m") is formatter_for("16m")
+    info = cache_info()["formatters"]
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_unhashable_options_are_not_cached():
+    from ..lexers import cache_info, clear_cache, lexer_for
+
+    clear_cache()
+    lexer = lexer_for("python", filters=["whitespace"])
+    assert lexer is not lexer_for("python", filters=["whitespace"])
+    assert cache_info()["lexers"].currsize == 0
+
+
+def test_shared_across_threads():
+    from ..lexers import clear_cache, lexer_for
+
+    clear_cache()
+    found = []
+    threads = [threading.Thread(target=lambda: found.append(lexer_for("yaml"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(found) == 8
+    assert all(lexer is lexer_for("yaml") for lexer in found)
+
+
+@dataclass
+class GuessData:
+    text: str
+    expected: str
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        GuessData('{"a": [1, 2, {"b": null}]}', "json"),
+        GuessData("  [true, false]", "json"),
+        GuessData('Traceback (most recent call last):\n  File "x.py", line 1, in <module>\nValueError: bad\n', "py3tb"),
+        GuessData("diff --git a/x b/x\n--- a/x\n+++ b/x\n@@ -1 +1 @@\n-a\n+b\n", "diff"),
+        GuessData("--- a/x\n+++ b/x\n", "diff"),
+        GuessData("select * from some_table;", "sql"),
+        GuessData("UPDATE users SET name = 'x' WHERE id = 1", "sql"),
+        GuessData("INSERT INTO users (name) VALUES ('x')", "sql"),
+        GuessData("CREATE TABLE users (id int)", "sql"),
+        GuessData('{"a": 1}\n{"b": 2}\n', "json"),
+        GuessData('{"a": [1, 2, {"b": nu', "json"),
+        # prose that merely starts like sql or json
+        GuessData("Update the config and restart", "text"),
+        GuessData("With great power comes great responsibility", "text"),
+        GuessData("Drop everything", "text"),
+        GuessData("Create a new user account", "text"),
+        GuessData("Select an item from the menu", "text"),
+        GuessData("[1, 2] items", "text"),
+        GuessData("---\nname: termlog\n", "yaml"),
+        GuessData("name: termlog\nversions:\n  - 1.3.5\n", "yaml"),
+        GuessData("#!/usr/bin/env python\nimport sys\n", "python"),
+        GuessData("#!/usr/bin/python3.11\n", "python"),
+        GuessData("#!/bin/bash\nset -e\n", "bash"),
+    ],
+)
+def test_guess_lexer(test_data):
+    from ..lexers import guess_lexer
+
+    lexer = guess_lexer(test_data.text, timeout=None)
+    assert test_data.expected in lexer.aliases
+    assert lexer.stripall
+
+
+def test_guess_lexer_matches_pygments():
+    import pygments.lexers
+
+    from ..lexers import guess_lexer
+
+    text = "a"
+    assert type(guess_lexer(text, timeout=None)) is type(pygments.lexers.guess_lexer(text))
+
+
+def test_guess_lexer_is_memoized(monkeypatch):
+    from .. import lexers
+
+    lexers.clear_cache()
+    calls = []
+    original = lexers._guess_lexer
+    monkeypatch.setattr(lexers, "_guess_lexer", lambda *args: calls.append(args) or original(*args))
+    text = "Note: this is prose\n" * 1000
+    lexer = lexers.guess_lexer(text, sample_size=64, timeout=None)
+    # Only the prefix is fingerprinted
+    assert lexers.guess_lexer(text + "more", sample_size=64, timeout=None) is lexer
+    assert [len(sample) for sample, _ in calls] == [64]
+
+
+def test_guess_lexer_timeout():
+    from ..lexers import guess_lexer
+
+    # No budget at all still produces a lexer
+    assert guess_lexer("plain words without structure", timeout=0)
+
+
+def test_guess_lexer_timeout_is_not_memoized(monkeypatch):
+    from .. import lexers
+
+    lexers.clear_cache()
+    calls = []
+    original = lexers._guess_lexer
+    monkeypatch.setattr(lexers, "_guess_lexer", lambda *args: calls.append(args) or original(*args))
+    text = "plain words without structure"
+    lexers.guess_lexer(text, timeout=0)
+    lexers.guess_lexer(text, timeout=0)
+    assert len(calls) == 2
+    lexers.guess_lexer(text, timeout=None)
+    lexers.guess_lexer(text, timeout=None)
+    assert len(calls) == 3
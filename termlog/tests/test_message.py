@@ -3,3 +3,77 @@ def test_multiline_echo():
 
     message = "hi"
     echo(f"{message}")
+
+
+def test_fields_resolved_lazily():
+    from ..message import Message
+
+    message = "hi"
+    plain = Message(f"{message}")
+    assert plain.__str__()
+    # the caller's frame is not kept alive for output without fields
+    assert not plain._call_sites
+
+    structured = Message(f"{message}", json=True)
+    assert structured._call_sites
+    assert structured._call_sites[0].fields is None
+    assert structured.__str__()
+    assert not structured._call_sites
+    assert structured.fields["message"] == "hi"
+
+
+def test_infer_fields_follows_config():
+    from ..config import _terminal_config, set_config
+    from ..message import Message
+
+    message = "hi"
+    try:
+        set_config(infer_fields=False)
+        msg = Message(f"{message}", json=True)
+        assert not msg.infer_fields
+        assert not msg._call_sites
+        assert Message(f"{message}", json=True, infer_fields=True)._call_sites
+    finally:
+        _terminal_config.infer_fields = True
+
+
+def test_as_json_does_not_copy():
+    from ..message import Message
+
+    payload = {"values": list(range(10))}
+    msg = Message("hi", json=True, include_timestamp=False, fields={"payload": payload}, infer_fields=False)
+    assert not hasattr(msg, "__dict__")
+    assert msg.as_json()["payload"] is payload
+
+
+def test_dataclass_fields_render_as_objects():
+    import json
+    from dataclasses import dataclass
+
+    from ..message import Message
+
+    @dataclass
+    class Point:
+        x: int = 1
+        y: int = 2
+
+    msg = Message("hi", json=True, include_timestamp=False, fields={"point": Point()}, infer_fields=False)
+    assert json.loads(f"{msg}") == {"data": "hi", "point": {"x": 1, "y": 2}}
+
+
+def test_concatenation_does_not_reintrospect(monkeypatch):
+    from .. import message as message_module
+    from ..message import Message
+
+    left = Message("\x1b[31mleft\x1b[0m", include_timestamp=False, fields={"a": 1}, infer_fields=False)
+    right = Message("right", include_timestamp=False, fields={"b": 2}, infer_fields=False)
+
+    def fail():
+        raise AssertionError("concatenation should not capture a call site")
+
+    monkeypatch.setattr(message_module, "capture", fail)
+    combined = "[" + left + " " + right + "\x1b[32m]"
+    assert combined._parts == ("[", "left", " ", "right", "]")
+    assert f"{combined}" == "[left right]"
+    assert combined.fields == {"a": 1, "b": 2}
+    assert combined._parts is None
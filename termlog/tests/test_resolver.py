@@ -0,0 +1,43 @@
+import sys
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+resolver_global = "global"
+
+
+@dataclass
+class ResolveData:
+    name: str
+    expected: Any = None
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        ResolveData("message", expected="local"),
+        ResolveData("resolver_global", expected="global"),
+        ResolveData("len", expected=len),
+        ResolveData("user.id", expected=7),
+        ResolveData("user.address.city", expected="Austin"),
+        ResolveData("user.missing"),
+        ResolveData("undefined"),
+    ],
+)
+def test_resolve(test_data):
+    from ..resolver import resolve
+
+    message = "local"
+    user = SimpleNamespace(id=7, address=SimpleNamespace(city="Austin"))
+    assert message and user
+    assert resolve(test_data.name, sys._getframe()) == test_data.expected
+
+
+def test_locals_shadow_globals():
+    from ..resolver import resolve_fields
+
+    resolver_global = "local"
+    assert resolver_global
+    assert resolve_fields(["resolver_global"], sys._getframe()) == {"resolver_global": "local"}
@@ -10,6 +10,15 @@ class TC:
     json: bool = False
     time_format: str = "%Y%m%d%H%M%S"
     timestamp: Optional[bool] = None
+    infer_fields: bool = True
+    bytecode_fields: bool = False
+    epoch_timestamps: bool = False
+    json_backend: str = "json"
+    block_highlighting: bool = False
+    minimize_sgr: bool = False
+    background: bool = False
+    queue_size: int = 10_000
+    queue_policy: str = "block"
 
     def __getitem__(self, item):
         data = asdict(self)
@@ -27,6 +36,15 @@ test_cases = [
     TC(json=True),
     TC(json=False),
     TC(time_format="%Y/%m/%d %H:%M:%S"),
+    TC(infer_fields=False),
+    TC(bytecode_fields=True),
+    TC(epoch_timestamps=True),
+    TC(json_backend="orjson"),
+    TC(block_highlighting=True),
+    TC(minimize_sgr=True),
+    TC(background=True),
+    TC(queue_size=100),
+    TC(queue_policy="drop-oldest"),
     TC(timestamp=False),
     TC(timestamp=True),
 ]
@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+
+import pytest
+
+
+def test_state_sequence():
+    from ..sgr import SGRState
+
+    state = SGRState()
+    assert state.sequence() == ""
+    state.apply("1;4;91;100")
+    assert state.sequence() == "\x1b[1;4;91;100m"
+    state.apply("24;39")
+    assert state.sequence() == "\x1b[1;100m"
+    state.apply("0")
+    assert not state.active
+
+
+def _renditions(text):
+    """The rendition of every visible character of *text*."""
+    import re
+
+    from ..sgr import SGRState
+
+    state = SGRState()
+    renditions = []
+    for index, piece in enumerate(re.split(r"\x1b\[([0-9;]*)m", text)):
+        if index % 2:
+            state.apply(piece)
+            continue
+        for character in piece:
+            if not character.isspace():
+                renditions.append((character, sorted(state.attributes), state.foreground, state.background))
+    return renditions
+
+
+@dataclass
+class MinimizeData:
+    text: str
+    expected: str
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        MinimizeData("plain", "plain"),
+        MinimizeData("\x1b[31ma\x1b[0m\x1b[31mb\x1b[0m", "\x1b[31mab\x1b[0m"),
+        MinimizeData("\x1b[31mx \x1b[32my\x1b[0m z\x1b[0m", "\x1b[31mx \x1b[32my\x1b[0m z"),
+        MinimizeData("\x1b[38;2;187;187;187m \x1b[39ma", " a"),
+        MinimizeData("\x1b[44m \x1b[0m", "\x1b[44m \x1b[0m"),
+        MinimizeData("\x1b[4m \x1b[0m", "\x1b[4m \x1b[0m"),
+        MinimizeData("\x1b[1;31ma\x1b[0m\x1b[31mb\x1b[0m", "\x1b[1;31ma\x1b[22mb\x1b[0m"),
+        MinimizeData("\x1b[31;1ma\x1b[0m\x1b[1;32mb\x1b[0m", "\x1b[1;31ma\x1b[32mb\x1b[0m"),
+        MinimizeData("a\x1b[31mb\nc\x1b[0m", "a\x1b[31mb\x1b[0m\n\x1b[31mc\x1b[0m"),
+        MinimizeData("\x1b[31m", "\x1b[31m"),
+        MinimizeData("\x1b[1;53;31ma\x1b[0m\x1b[1;31mb", "\x1b[1;53;31ma\x1b[55mb"),
+        MinimizeData("\x1b[10ma\x1b[0mb", "\x1b[10ma\x1b[0mb"),
+    ],
+)
+def test_minimize(test_data):
+    from ..message import strip_escape
+    from ..sgr import minimize
+
+    minimized = minimize(test_data.text)
+    assert minimized == test_data.expected
+    assert strip_escape(minimized) == strip_escape(test_data.text)
+    assert _renditions(minimized) == _renditions(test_data.text)
+
+
+@pytest.mark.parametrize("lexer", ["python", "json", "sql", "bash"])
+def test_highlight_matches_formatter(lexer):
+    import pygments
+
+    from ..lexers import formatter_for, lexer_for
+    from ..sgr import highlight
+
+    code = 'def f(x="a\nb"):\n    return {"a": [1, 2.5, None]}  # done\nSELECT * FROM t WHERE a = \'b\';\necho "$HOME"\n'
+    expected = pygments.highlight(code, lexer_for(lexer), formatter_for("16m"))
+    highlighted = highlight(lexer_for(lexer).get_tokens(code), formatter_for("16m"))
+    assert _renditions(highlighted) == _renditions(expected)
+    assert len(highlighted) < len(expected)
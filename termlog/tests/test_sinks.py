@@ -0,0 +1,84 @@
+import io
+import time
+from dataclasses import dataclass, field
+
+import pytest
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+@dataclass
+class FlushData:
+    policy: dict
+    lines: int
+    expected_writes: int
+    severities: dict = field(default_factory=dict)
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        # held until flushed
+        FlushData(dict(max_delay=None), lines=100, expected_writes=0),
+        FlushData(dict(max_delay=None, max_records=10), lines=100, expected_writes=10),
+        FlushData(dict(max_delay=None, max_bytes=45), lines=100, expected_writes=20),
+        # errors flush immediately, with everything before them
+        FlushData(dict(max_delay=None), lines=100, expected_writes=2, severities={10: 40, 50: 50}),
+        FlushData(dict(max_delay=None, flush_severity=50), lines=100, expected_writes=1, severities={10: 40, 50: 50}),
+        # a burst is coalesced after its first line
+        FlushData(dict(max_delay=None, adaptive=True, burst_interval=1.0), lines=100, expected_writes=1),
+        # slow traffic always counts as quiet
+        FlushData(dict(max_delay=None, adaptive=True, burst_interval=0.0), lines=100, expected_writes=100),
+    ],
+)
+def test_flush_policy(test_data):
+    from ..sinks import BufferedSink, FlushPolicy
+
+    stream = CountingStream()
+    sink = BufferedSink(stream, FlushPolicy(**test_data.policy))
+    for index in range(test_data.lines):
+        sink.write(f"line {index:03}\n", severity=test_data.severities.get(index, 0))
+    assert stream.writes == test_data.expected_writes
+    sink.close()
+    assert stream.getvalue() == "".join(f"line {index:03}\n" for index in range(test_data.lines))
+    assert not stream.closed
+
+
+def test_flushes_after_delay():
+    from ..sinks import BufferedSink, FlushPolicy
+
+    stream = CountingStream()
+    sink = BufferedSink(stream, FlushPolicy(max_delay=0.01))
+    sink.write("a\n")
+    sink.write("b\n")
+    assert stream.getvalue() == ""
+    deadline = time.monotonic() + 5
+    while not stream.getvalue() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert stream.getvalue() == "a\nb\n"
+    assert stream.writes == 1
+    sink.close()
+    with pytest.raises(ValueError):
+        sink.write("c\n")
+
+
+def test_echo_to_sink(capsys):
+    from .. import echo
+    from ..sinks import BufferedSink, FlushPolicy
+
+    sink = BufferedSink(policy=FlushPolicy(max_delay=None))
+    echo("held", file=sink, color=False, add_timestamp=False)
+    assert capsys.readouterr().out == ""
+    echo("failed", file=sink, color=False, add_timestamp=False, severity=40)
+    assert capsys.readouterr().out == "held\nfailed\n"
+    echo("flushed", file=sink, color=False, add_timestamp=False, flush=True)
+    assert capsys.readouterr().out == "flushed\n"
+    sink.close()
@@ -0,0 +1,72 @@
+import io
+from dataclasses import dataclass
+
+import pytest
+
+COLORED = "a\x1b[31mred\x1b[0m b\x1b]8;;https://example.com\x1b\\link\x1b]8;;\x07 \x1b(Bé"
+
+
+@dataclass
+class StreamData:
+    chunks: tuple
+    buffer_size: int = 1
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        StreamData((COLORED,)),
+        StreamData((COLORED,), buffer_size=1024),
+        # split at every position, draining as often as possible
+        *[StreamData((COLORED[:index], COLORED[index:])) for index in range(len(COLORED))],
+        StreamData(tuple(COLORED)),
+    ],
+)
+def test_strip_escape_writer(test_data):
+    from ..message import strip_escape
+    from ..streams import StripEscapeBytesWriter, StripEscapeWriter
+
+    text = io.StringIO()
+    with StripEscapeWriter(text, buffer_size=test_data.buffer_size) as writer:
+        for chunk in test_data.chunks:
+            assert writer.write(chunk) == len(chunk)
+    assert text.getvalue() == strip_escape(COLORED)
+    assert not text.closed
+
+    binary = io.BytesIO()
+    with StripEscapeBytesWriter(binary, buffer_size=test_data.buffer_size) as writer:
+        for chunk in test_data.chunks:
+            writer.write(bytearray(chunk.encode("utf-8")))
+    assert binary.getvalue() == strip_escape(COLORED).encode("utf-8")
+
+
+def test_writer_buffers():
+    from ..streams import StripEscapeWriter
+
+    text = io.StringIO()
+    writer = StripEscapeWriter(text, buffer_size=8)
+    writer.write("\x1b[1mab")
+    assert text.getvalue() == ""
+    writer.write("cdefgh\x1b[3")
+    # the incomplete sequence is held back until the next write
+    assert text.getvalue() == "abcdefgh"
+    writer.flush()
+    assert text.getvalue() == "abcdefgh"
+    writer.write("1mi")
+    writer.close()
+    assert text.getvalue() == "abcdefghi"
+    with pytest.raises(ValueError):
+        writer.write("j")
+
+
+def test_writer_bounds_unterminated_sequences():
+    from ..streams import MAX_SEQUENCE_LENGTH, StripEscapeWriter
+
+    text = io.StringIO()
+    writer = StripEscapeWriter(text, buffer_size=1024)
+    unterminated = "\x1b]0;" + "x" * MAX_SEQUENCE_LENGTH * 4
+    for index in range(0, len(unterminated), 1024):
+        writer.write(unterminated[index : index + 1024])
+        assert writer._size <= MAX_SEQUENCE_LENGTH + 1024
+    writer.close()
+    assert text.getvalue() == unterminated
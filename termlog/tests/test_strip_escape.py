@@ -18,6 +18,13 @@ class StripEscapeData:
         StripEscapeData("", ""),
         StripEscapeData("\033[33m\033[0m", ""),
         StripEscapeData("\x1b[38;5;245ma\x1b[39m", "a"),
+        StripEscapeData("\x1b[2J\x1b[1;1Hd\x1b[?25l\x1b[K", "d"),
+        StripEscapeData("\x1b]8;;https://example.com\x1b\\link\x1b]8;;\x1b\\", "link"),
+        StripEscapeData("\x1b]0;title\x07e", "e"),
+        StripEscapeData("\x1b(Bf\x1b)0\x1b7\x1b8", "f"),
+        StripEscapeData("g\x1b[31", "g\x1b[31"),
+        StripEscapeData("h\x1b]0;unterminated", "h\x1b]0;unterminated"),
+        StripEscapeData("\u00e9\x1b[1m\u00e9", "\u00e9\u00e9"),
         StripEscapeData(
             input="""{"data": "available=\u001b[31mNone\u001b[0m download=\u001b[35mNone\u001b[0m clean=\u001b[33mNone\u001b[0m verbose=\u001b[32m1\u001b[0m", "timestamp": "2019-02-22 22:57:04.459103", "available": null, "download": null, "clean": null, "verbose": 1}""",
             output="""{"data": "available=None download=None clean=None verbose=1", "timestamp": "2019-02-22 22:57:04.459103", "available": null, "download": null, "clean": null, "verbose": 1}""",
@@ -33,3 +40,43 @@ def test_strip_escape(test_data):
 
     value = strip_escape(test_data.input)
     assert value == test_data.output
+
+
+def test_strip_escape_without_escapes_is_identity():
+    from ..message import strip_escape
+
+    text = "no escapes here"
+    assert strip_escape(text) is text
+
+
+def test_strip_escape_is_linear():
+    import time
+
+    from ..message import strip_escape
+
+    # Unterminated sequences must not make the pattern backtrack
+    hostile = ("\x1b[" + "0;" * 5000) * 20 + "\x1b]" + "x" * 100000
+    start = time.perf_counter()
+    assert strip_escape(hostile) == hostile
+    assert time.perf_counter() - start < 1
+
+
+def test_message_strips_once(monkeypatch):
+    from .. import message as module
+
+    calls = []
+    original = module.strip_escape
+
+    def counting(text):
+        calls.append(text)
+        return original(text)
+
+    monkeypatch.setattr(module, "strip_escape", counting)
+    msg = module.Message("\x1b[31ma\x1b[0m", timestamp="ts", infer_fields=False)
+    assert str(msg) == "ts a"
+    assert str(msg + "\x1b[32mb") == "ts ab"
+    # Only the timestamp is checked on render, data was stripped once
+    assert [text for text in calls if text != "ts "] == ["\x1b[31ma\x1b[0m", "\x1b[32mb"]
+
+    msg.data = "\x1b[33mc"
+    assert str(msg) == "ts c"
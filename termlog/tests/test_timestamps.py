@@ -0,0 +1,61 @@
+import datetime
+from dataclasses import dataclass
+
+import pytest
+
+# 2019-02-22 22:57:04.459103 UTC
+NS = 1550876224459103123
+
+
+@dataclass
+class TimestampData:
+    time_format: str
+    expected: str
+
+
+@pytest.mark.parametrize(
+    "test_data",
+    [
+        TimestampData("%Y%m%d%H%M%S", "20190222225704"),
+        TimestampData("%Y-%m-%d %H:%M:%S.%f", "2019-02-22 22:57:04.459103"),
+        TimestampData("%f|%S|%f", "459103|04|459103"),
+        TimestampData("%%f %S", "%f 04"),
+        TimestampData("", ""),
+    ],
+)
+def test_format_ns(test_data):
+    from ..timestamps import TimestampFormatter
+
+    formatter = TimestampFormatter(test_data.time_format)
+    assert formatter.format_ns(NS) == test_data.expected
+    # second call is served from the per-second cache
+    assert formatter.format_ns(NS + 1000) == test_data.expected.replace("459103", "459104")
+
+
+def test_matches_strftime():
+    from ..timestamps import get_formatter
+
+    time_format = "%Y/%m/%d %H:%M:%S.%f"
+    expected = datetime.datetime(2019, 2, 22, 22, 57, 4, 459103).strftime(time_format)
+    assert get_formatter(time_format).format_ns(NS) == expected
+    assert get_formatter(time_format) is get_formatter(time_format)
+
+
+def test_timezone():
+    from ..timestamps import get_formatter
+
+    tz = datetime.timezone(datetime.timedelta(hours=-6))
+    assert get_formatter("%H:%M %z", tz).format_ns(NS) == "16:57 -0600"
+
+
+def test_epoch_timestamps():
+    import json
+
+    from .. import format, set_config
+
+    set_config(epoch_timestamps=True)
+    try:
+        output = json.loads(format("hi", json=True, add_timestamp=True))
+    finally:
+        set_config(epoch_timestamps=False)
+    assert isinstance(output["timestamp"], int)
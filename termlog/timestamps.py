@@ -0,0 +1,107 @@
+"""Timestamp rendering
+
+Formatting a timestamp with ``strftime`` on every log line is wasteful
+when most lines share the same second.  A :class:`TimestampFormatter`
+renders everything but the sub-second part (``%f``) once per second and
+splices the microseconds in for each call.
+
+"""
+import datetime
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+__all__ = ("TimestampFormatter", "get_formatter", "split_subseconds")
+
+_formatters: Dict[Tuple[str, Optional[datetime.tzinfo]], "TimestampFormatter"] = {}
+
+
+@dataclass
+class TimestampFormatter:
+    """Formats epoch nanoseconds with *time_format*
+
+    Attributes:
+        time_format: strftime format
+        tz: timezone to render in; None renders naive UTC, like
+            ``datetime.utcnow()``
+        segments: *time_format* split around each ``%f``
+
+    """
+
+    time_format: str = "%Y%m%d%H%M%S"
+    tz: Optional[datetime.tzinfo] = None
+    segments: Tuple[str, ...] = field(default=(), init=False, repr=False)
+    _cache: Tuple[int, Tuple[str, ...]] = field(default=(-1, ()), init=False, repr=False)
+
+    def __post_init__(self):
+        self.segments = split_subseconds(self.time_format)
+
+    def format_ns(self, ns: int) -> str:
+        """Formats *ns* nanoseconds since the epoch.
+
+        Args:
+            ns: nanoseconds since the epoch, e.g. from ``time.time_ns()``
+
+        Returns:
+            the formatted timestamp
+
+        """
+        second, nanoseconds = divmod(ns, 1_000_000_000)
+        cached = self._cache
+        if cached[0] != second:
+            moment = datetime.datetime.fromtimestamp(second, self.tz or datetime.timezone.utc)
+            if self.tz is None:
+                moment = moment.replace(tzinfo=None)
+            # a single tuple assignment keeps concurrent readers consistent
+            cached = self._cache = (second, tuple(moment.strftime(segment) for segment in self.segments))
+        rendered = cached[1]
+        if len(rendered) == 1:
+            return rendered[0]
+        return f"{nanoseconds // 1000:06d}".join(rendered)
+
+
+def split_subseconds(time_format: str) -> Tuple[str, ...]:
+    """Splits *time_format* around each ``%f`` directive.
+
+    Args:
+        time_format: strftime format
+
+    Returns:
+        the per-second segments of the format
+
+    """
+    segments = []
+    current = ""
+    index = 0
+    while index < len(time_format):
+        directive = time_format[index : index + 2]
+        if directive == "%f":
+            segments.append(current)
+            current = ""
+            index += 2
+        elif directive[:1] == "%":
+            # keeps escapes such as %% intact
+            current += directive
+            index += 2
+        else:
+            current += directive[:1]
+            index += 1
+    segments.append(current)
+    return tuple(segments)
+
+
+def get_formatter(time_format: str, tz: Optional[datetime.tzinfo] = None) -> TimestampFormatter:
+    """Looks up the shared formatter for *time_format* and *tz*.
+
+    Args:
+        time_format: strftime format
+        tz: timezone to render in
+
+    Returns:
+        formatter
+
+    """
+    key = (time_format, tz)
+    formatter = _formatters.get(key)
+    if formatter is None:
+        formatter = _formatters[key] = TimestampFormatter(time_format=time_format, tz=tz)
+    return formatter
@@ -0,0 +1,24 @@
+import subprocess
+import sys
+import textwrap
+
+
+def test_queued_messages_are_written_at_exit():
+    code = textwrap.dedent(
+        """
+        import sys
+
+        import termlog
+        from termlog.sinks import BufferedSink, FlushPolicy
+
+        termlog.set_config(background=True, color=False, timestamp=False)
+        sink = BufferedSink(sys.stderr, FlushPolicy(max_delay=None))
+        for index in range(5000):
+            termlog.echo(index)
+            termlog.echo(index, file=sink)
+        """
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    expected = [str(index) for index in range(5000)]
+    assert result.stdout.split() == expected
+    assert result.stderr.split() == expected
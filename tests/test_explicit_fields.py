@@ -0,0 +1,26 @@
+import json
+
+
+def test_explicit_fields():
+    """Explicit fields produce the same json as inferred fields, but
+    nothing is read from the calling code.
+
+    """
+    from termlog import format
+
+    message = "green"
+    inferred = json.loads(format(f"A {message} message!", json=True, color=False, add_timestamp=False))
+    explicit = json.loads(format(f"A {message} message!", json=True, color=False, add_timestamp=False, fields={"message": message}))
+    assert inferred == explicit == {"data": "A green message!", "message": "green"}
+
+
+def test_disabled_field_inference():
+    from termlog import format, set_config
+
+    message = "green"
+    set_config(infer_fields=False)
+    try:
+        output = json.loads(format(f"A {message} message!", json=True, color=False, add_timestamp=False))
+    finally:
+        set_config(infer_fields=True)
+    assert output == {"data": "A green message!"}
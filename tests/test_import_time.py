@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+# Cumulative microseconds `import termlog` may take, as reported by
+#  `python -X importtime`; generous, since CI machines vary
+IMPORT_BUDGET = 150_000
+
+# Only imported once something is highlighted, colored or encoded by them
+LAZY_MODULES = ["pygments", "orjson", "asyncio", "termlog.palettes", "termlog.colors", "termlog.lexers", "termlog.sgr", "termlog.aio"]
+
+
+def test_import_is_lazy():
+    code = f"import sys, termlog; print([name for name in {LAZY_MODULES!r} if name in sys.modules])"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+
+def test_import_time_budget():
+    durations = []
+    for _ in range(3):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import termlog"], capture_output=True, text=True, check=True)
+        # import time: self [us] | cumulative | imported package
+        lines = [line.split("|") for line in result.stderr.splitlines() if line.startswith("import time:")]
+        durations.extend(int(cumulative) for _, cumulative, name in lines if name.strip() == "termlog")
+    assert min(durations) < IMPORT_BUDGET
+
+
+def test_lazy_attributes():
+    code = (
+        "import termlog; "
+        "print(termlog.red('x', color=False), termlog.Color.__name__, termlog.get_palette().name, termlog.palettes.__name__)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.split() == ["x", "Color", "default", "termlog.palettes"]
+
+
+def test_import_star():
+    code = "from termlog import *; print(red('x', color=False), Color.__name__, aecho.__name__)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.split() == ["x", "Color", "aecho"]